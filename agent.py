@@ -1,27 +1,110 @@
 """Gestion des agents du jeu"""
+import itertools
 import random
 from config import Config
+from environment import EVENT_WOOD_DEPOSITED, EVENT_AGENT_STUCK, EVENT_AGENT_MOVED
+from pathfinding import MOVES, manhattan, space_time_astar
 
 # Variable globale pour la portée de vision (modifiable au runtime)
 vision_range = Config.VISION_RANGE
 
+# Codes des rôles (Agent.role_code)
+ROLE_GATHERER, ROLE_BUILDER, ROLE_MANAGER = range(3)
+ROLE_NAMES = ("gatherer", "builder", "manager")
+ROLE_CODES = {name: code for code, name in enumerate(ROLE_NAMES)}
+
+# Coordonnées empaquetées dans un entier : y << COORD_BITS | x (-1 = aucune)
+COORD_BITS = 16
+COORD_MASK = (1 << COORD_BITS) - 1
+NO_POS = -1
+
+
+def pack(x, y):
+    """Empaquette une position (x, y) dans un entier"""
+    return (y << COORD_BITS) | x
+
+
+def unpack(packed):
+    """Position (x, y) d'un entier empaqueté (None pour NO_POS)"""
+    if packed < 0:
+        return None
+    return (packed & COORD_MASK, packed >> COORD_BITS)
+
+
 class Agent:
     """Représente un agent dans la simulation"""
     
+    # Pas de __dict__ par instance : l'état tient dans ces emplacements
+    __slots__ = (
+        "uid", "rng", "x", "y", "role_code", "inventory", "_target", "state",
+        "_last_pos", "stuck_counter", "ignore_target_turns", "_manager_hint",
+        "plan", "plan_tick", "plan_goal", "planned_wait",
+        "route", "waypoints", "route_goal", "route_version",
+    )
+    
     # Liste partagée de tous les agents (mise à jour par le jeu)
     all_agents = []
     
+    # Générateur d'identifiants uniques
+    _uids = itertools.count()
+    
     def __init__(self, x, y, role):
+        self.uid = next(Agent._uids)  # Identifiant stable (partagé par les copies de travail)
+        self.rng = random  # Source d'aléa (remplaçable par un random.Random dédié)
         self.x = x
         self.y = y
-        self.role = role  # "gatherer", "builder", "manager"
+        self.role_code = ROLE_CODES[role]  # ROLE_GATHERER, ROLE_BUILDER ou ROLE_MANAGER
         self.inventory = None
-        self.target = None
+        self._target = NO_POS
         self.state = "idle"
-        self.last_pos = (x, y)  # Dernière position
+        self._last_pos = pack(x, y)  # Dernière position
         self.stuck_counter = 0  # Compteur de tours sur la même case
         self.ignore_target_turns = 0  # Compteur de tours à ignorer l'objectif
-        self.manager_hint = None  # Direction donnée par le manager (x, y)
+        self._manager_hint = NO_POS  # Direction donnée par le manager
+        self.plan = ()  # Positions planifiées (déplacement coopératif), plan[i] au tick plan_tick + i
+        self.plan_tick = 0
+        self.plan_goal = None
+        self.planned_wait = False  # Attente prévue par le plan (ne compte pas comme blocage)
+        self.route = ()  # Cases du segment raffiné en cours (planificateur hiérarchique)
+        self.waypoints = None  # Points de passage restants (None = pas de chemin)
+        self.route_goal = None
+        self.route_version = -1
+
+    @property
+    def role(self):
+        """Nom du rôle ("gatherer", "builder", "manager")"""
+        return ROLE_NAMES[self.role_code]
+
+    @role.setter
+    def role(self, name):
+        self.role_code = ROLE_CODES[name]
+
+    @property
+    def target(self):
+        """Cible (x, y) ou None"""
+        return unpack(self._target)
+
+    @target.setter
+    def target(self, pos):
+        self._target = NO_POS if pos is None else pack(*pos)
+
+    @property
+    def last_pos(self):
+        """Dernière position (x, y) retenue par la détection de blocage"""
+        return unpack(self._last_pos)
+
+    @last_pos.setter
+    def last_pos(self, pos):
+        self._last_pos = pack(*pos)
+
+    @property
+    def manager_hint(self):
+        """Direction (x, y) donnée par le manager, ou None"""
+        return unpack(self._manager_hint)
+
+    @manager_hint.setter
+    def manager_hint(self, pos):
+        self._manager_hint = NO_POS if pos is None else pack(*pos)
     
     def _check_stuck(self, env):
         """Vérifie si l'agent est bloqué et ignore l'objectif pendant 15 tours si nécessaire"""
@@ -33,16 +116,19 @@ class Agent:
             self.ignore_target_turns -= 1
             return True  # Continuer à ignorer
         
-        if (self.x, self.y) == self.last_pos:
-            self.stuck_counter += 1
+        position = pack(self.x, self.y)
+        if position == self._last_pos:
+            if not self.planned_wait:
+                self.stuck_counter += 1
         else:
             self.stuck_counter = 0
-            self.last_pos = (self.x, self.y)
+            self._last_pos = position
         
         if self.stuck_counter >= Config.STUCK_THRESHOLD:
+            env.emit(EVENT_AGENT_STUCK, (self.x, self.y))
             # Ignorer l'objectif pendant 15 tours
             self.ignore_target_turns = 15
-            self.target = None
+            self._target = NO_POS
             self.stuck_counter = 0
             return True
         return False
@@ -52,7 +138,7 @@ class Agent:
         if not Config.PREVENT_COLLISION:
             return False
         for agent in Agent.all_agents:
-            if agent is not self and agent.x == x and agent.y == y:
+            if agent.uid != self.uid and agent.x == x and agent.y == y:
                 return True
         return False
     
@@ -65,8 +151,43 @@ class Agent:
         cell = env.grid[y][x]
         return cell != Config.WATER and cell != Config.WALL
 
+    def _can_reach(self, env, x, y):
+        """Vrai si la case est atteignable depuis la position de l'agent (index de connexité)"""
+        return env.connectivity is None or env.connectivity.is_reachable((self.x, self.y), (x, y))
+
+    def _step_to(self, env, x, y):
+        """Déplace l'agent sur la case (x, y) et vérifie l'arrivée"""
+        old_x, old_y = self.x, self.y
+        self.x, self.y = x, y
+        if env.zobrist is not None:
+            env.zobrist.agent_changed(self, old_x, old_y, self.inventory)
+        if EVENT_AGENT_MOVED in env.observed:
+            env.emit(EVENT_AGENT_MOVED, (self, old_x, old_y))
+        env.check_arrival(x, y)
+
+    def _carry(self, env, item):
+        """Change l'inventaire ("wood" ou None)"""
+        old = self.inventory
+        self.inventory = item
+        if env.zobrist is not None:
+            env.zobrist.agent_changed(self, self.x, self.y, old)
+
     def move_towards(self, env, target_x, target_y):
         """Déplace l'agent vers une cible en évitant l'eau, les murs et les collisions"""
+        if env.planner is not None:
+            # Suivre le chemin hiérarchique : viser sa prochaine case
+            # (ou la fin du segment en cours pour la planification coopérative)
+            waypoint = self._route_waypoint(env, (target_x, target_y), env.reservations is not None)
+            if waypoint is not None:
+                target_x, target_y = waypoint
+        
+        if env.reservations is not None:
+            self._move_cooperative(env, target_x, target_y)
+            return
+        self._move_greedy(env, target_x, target_y)
+
+    def _move_greedy(self, env, target_x, target_y):
+        """Fait un pas vers la cible (axe x puis axe y) si la case est libre"""
         candidates = []
         if self.x < target_x:
             candidates.append((self.x + 1, self.y))
@@ -81,20 +202,133 @@ class Agent:
         for nx, ny in candidates:
             if self._is_walkable(env, nx, ny):
                 if not self._is_cell_occupied(nx, ny):
-                    self.x, self.y = nx, ny
-                    env.check_arrival(self.x, self.y)
+                    self._step_to(env, nx, ny)
                     return
 
+    def _route_waypoint(self, env, goal, segment_end=False):
+        """Prochaine case (ou fin du segment) du chemin hiérarchique vers le but"""
+        planner = env.planner
+        pos = (self.x, self.y)
+        
+        # Nouveau but, ou échec précédent alors que la carte a changé : nouvelle requête
+        if self.route_goal != goal or (self.waypoints is None and self.route_version != planner.version):
+            self.route_goal = goal
+            self.route_version = planner.version
+            self.waypoints = planner.find_path(pos, goal)
+            self.route = ()
+        if self.waypoints is None:
+            return None
+        
+        # Avancer sur la route déjà raffinée (listes réaffectées et non modifiées
+        # sur place : la copie de travail du tick en deux phases les partage)
+        if pos in self.route:
+            self.route = self.route[self.route.index(pos) + 1:]
+        elif self.route and manhattan(pos, self.route[0]) != 1:
+            # Écarté de la route (collision) : nouvelle requête depuis la position actuelle
+            self.waypoints = planner.find_path(pos, goal)
+            self.route = ()
+            if self.waypoints is None:
+                return None
+        
+        # Raffiner paresseusement le segment suivant
+        if not self.route and self.waypoints:
+            self.route = planner.refine(pos, self.waypoints[0]) or ()
+            self.waypoints = self.waypoints[1:]
+        if not self.route:
+            return None
+        return self.route[-1] if segment_end else self.route[0]
+
+    def _move_cooperative(self, env, target_x, target_y):
+        """Suit un chemin planifié dans l'espace-temps en respectant les réservations des autres agents"""
+        t = env.tick
+        goal = (target_x, target_y)
+        self.planned_wait = False
+        
+        step = self._next_planned_step(goal, t)
+        if step is None:
+            path = self._plan_path(env, goal, t)
+            if path is None:
+                # Aucun chemin coopératif ne rapproche du but : pas glouton classique
+                self._drop_plan(env)
+                self._move_greedy(env, target_x, target_y)
+                return
+            if not path:
+                return  # Déjà au but
+            step = path[0]
+        
+        if step == (self.x, self.y):
+            # Attente prévue pour laisser passer un autre agent
+            self.planned_wait = True
+        elif self._is_walkable(env, *step) and not self._is_cell_occupied(*step):
+            self._step_to(env, *step)
+        else:
+            # Case prise par un agent hors plan : replanifier au prochain tick
+            self._drop_plan(env)
+
+    def _next_planned_step(self, goal, t):
+        """Prochaine position du plan en cours (None s'il faut replanifier)"""
+        if self.plan_goal != goal:
+            return None
+        i = t - self.plan_tick
+        if not (0 <= i < len(self.plan) - 1) or self.plan[i] != (self.x, self.y):
+            return None
+        return self.plan[i + 1]
+
+    def _plan_path(self, env, goal, t):
+        """Planifie et réserve un chemin vers le but sur la fenêtre de réservation"""
+        table = env.reservations
+        # Les agents sans plan au prochain tick sont considérés comme immobiles
+        blockers = {(agent.x, agent.y) for agent in Agent.all_agents
+                    if agent.uid != self.uid and not table.has_reservation(agent.uid, t + 1)}
+        
+        def move_free(start, end, tick):
+            if tick == t and end in blockers:
+                return False
+            return table.is_move_free(start, end, tick, self.uid)
+        
+        start = (self.x, self.y)
+        path = space_time_astar(start, goal, t, Config.RESERVATION_WINDOW,
+                                lambda x, y: self._is_walkable(env, x, y), move_free)
+        if path:
+            table.reserve_path(self.uid, start, path, t)
+            self.plan = [start] + path
+            self.plan_tick = t
+            self.plan_goal = goal
+        return path
+
+    def _drop_plan(self, env):
+        """Abandonne le plan en cours et libère ses réservations"""
+        if env.reservations is not None:
+            env.reservations.release(self.uid)
+        self.plan = ()
+        self.plan_goal = None
+
+    def _yield_to_planned(self, env):
+        """S'écarte si un autre agent a réservé notre case pour le prochain tick"""
+        owner = env.reservations.owner(self.x, self.y, env.tick + 1)
+        if owner is None or owner == self.uid:
+            return False
+        directions = list(MOVES)
+        self.rng.shuffle(directions)
+        for dx, dy in directions:
+            nx, ny = self.x + dx, self.y + dy
+            if self._is_walkable(env, nx, ny) and not self._is_cell_occupied(nx, ny) \
+                    and env.reservations.is_free(nx, ny, env.tick + 1, self.uid):
+                self._drop_plan(env)
+                self._step_to(env, nx, ny)
+                return True
+        return False
+
     def random_walk(self, env):
         """Déplacement aléatoire limité à la grille et évitant l'eau, les murs et les collisions"""
+        self._drop_plan(env)
         directions = [(1, 0), (-1, 0), (0, 1), (0, -1)]
-        random.shuffle(directions)
+        self.rng.shuffle(directions)
         for dx, dy in directions:
             nx, ny = self.x + dx, self.y + dy
             if self._is_walkable(env, nx, ny):
                 if not self._is_cell_occupied(nx, ny):
-                    self.x, self.y = nx, ny
-                    env.check_arrival(self.x, self.y)
+                    self._step_to(env, nx, ny)
                     return
 
     def _is_visible(self, x, y):
@@ -122,29 +356,51 @@ class Agent:
                 if 0 <= nx < cols and 0 <= ny < rows:
                     yield nx, ny
 
+    def _iter_visible_of(self, env, value):
+        """Cellules visibles d'un type de terrain (dans l'ordre de _iter_visible_cells)"""
+        if env.bitboards is not None:
+            return env.bitboards.iter_diamond(value, self.x, self.y, vision_range)
+        return ((c, r) for c, r in self._iter_visible_cells(env) if env.grid[r][c] == value)
+
+    @staticmethod
+    def _iter_cells_of(env, value):
+        """Toutes les cellules d'un type de terrain, ligne par ligne"""
+        if env.bitboards is not None:
+            return env.bitboards.iter_cells(value)
+        return ((c, r) for r, row in enumerate(env.grid) for c, cell in enumerate(row) if cell == value)
+
     def find_nearest_resource(self, env, resource_type):
         """Trouve la ressource la plus proche non occupée"""
         min_dist = float('inf')
         nearest = None
 
-        for c, r in self._iter_visible_cells(env):
-            if env.grid[r][c] == resource_type:
-                # Vérifier si la case n'est pas occupée par un autre agent
-                if self._is_cell_occupied(c, r):
-                    continue
-                dist = abs(self.x - c) + abs(self.y - r)
-                if dist < min_dist:
-                    min_dist = dist
-                    nearest = (c, r)
+        for c, r in self._iter_visible_of(env, resource_type):
+            # Vérifier si la case n'est pas occupée par un autre agent
+            if self._is_cell_occupied(c, r):
+                continue
+            dist = abs(self.x - c) + abs(self.y - r)
+            # Ignorer les ressources inatteignables (derrière un mur, autre rive)
+            if dist < min_dist and not self._can_reach(env, c, r):
+                continue
+            if dist < min_dist:
+                min_dist = dist
+                nearest = (c, r)
         return nearest
 
+    @staticmethod
+    def _is_open_water(env, x, y):
+        """Vrai si (x, y) est de l'eau d'une rivière pas encore traversée"""
+        if env.grid[y][x] != Config.WATER:
+            return False
+        river = env.river_at(x, y)
+        return river is None or not river.is_crossed()
+
     def _find_visible_bridge(self, env):
         """Trouve le pont le plus à droite visible dans le champ de vision"""
         rightmost_bridge = None
-        for c, r in self._iter_visible_cells(env):
-            if env.grid[r][c] == Config.BRIDGE:
-                if rightmost_bridge is None or c > rightmost_bridge[0]:
-                    rightmost_bridge = (c, r)
+        for c, r in self._iter_visible_of(env, Config.BRIDGE):
+            if rightmost_bridge is None or c > rightmost_bridge[0]:
+                rightmost_bridge = (c, r)
         return rightmost_bridge
     
     def _get_bridge_continuation(self, env, bridge_pos):
@@ -156,16 +412,17 @@ class Agent:
         # Priorité 1: case d'eau à DROITE du pont
         nx, ny = bx + 1, by
         if 0 <= nx < cols and 0 <= ny < rows:
-            if env.grid[ny][nx] == Config.WATER:
-                if not self._is_cell_occupied(nx, ny):
+            if self._is_open_water(env, nx, ny):
+                if not self._is_cell_occupied(nx, ny) and self._can_reach(env, nx, ny):
                     return (nx, ny)
         
         # Priorité 2: autres directions (gauche, haut, bas) seulement si pas d'eau à droite
+        # (l'eau d'une rivière déjà traversée est ignorée)
         for dx, dy in [(-1, 0), (0, -1), (0, 1)]:
             nx, ny = bx + dx, by + dy
             if 0 <= nx < cols and 0 <= ny < rows:
-                if env.grid[ny][nx] == Config.WATER:
-                    if not self._is_cell_occupied(nx, ny):
+                if self._is_open_water(env, nx, ny):
+                    if not self._is_cell_occupied(nx, ny) and self._can_reach(env, nx, ny):
                         return (nx, ny)
         return None
 
@@ -176,31 +433,28 @@ class Agent:
         
         # Priorité 1: Chercher le pont le plus à droite visible et continuer à sa droite
         rightmost_bridge = None
-        for c, r in self._iter_visible_cells(env):
-            if env.grid[r][c] == Config.BRIDGE:
-                if rightmost_bridge is None or c > rightmost_bridge[0]:
-                    rightmost_bridge = (c, r)
+        for c, r in self._iter_visible_of(env, Config.BRIDGE):
+            if rightmost_bridge is None or c > rightmost_bridge[0]:
+                rightmost_bridge = (c, r)
         
         if rightmost_bridge is not None:
             # Vérifier s'il y a de l'eau à droite de ce pont
             rx, ry = rightmost_bridge
-            if rx + 1 < cols and env.grid[ry][rx + 1] == Config.WATER:
-                if not self._is_cell_occupied(rx + 1, ry):
+            if rx + 1 < cols and self._is_open_water(env, rx + 1, ry):
+                if not self._is_cell_occupied(rx + 1, ry) and self._can_reach(env, rx + 1, ry):
                     return (rx + 1, ry)
             
             # Sinon, chercher de l'eau adjacente à n'importe quel pont visible
-            for c, r in self._iter_visible_cells(env):
-                if env.grid[r][c] == Config.BRIDGE:
-                    continuation = self._get_bridge_continuation(env, (c, r))
-                    if continuation:
-                        return continuation
+            for c, r in self._iter_visible_of(env, Config.BRIDGE):
+                continuation = self._get_bridge_continuation(env, (c, r))
+                if continuation:
+                    return continuation
             return None
         
-        # Sinon, chercher n'importe quelle case d'eau visible non occupée
-        for c, r in self._iter_visible_cells(env):
-            if env.grid[r][c] == Config.WATER:
-                if not self._is_cell_occupied(c, r):
-                    return (c, r)
+        # Sinon, chercher n'importe quelle case d'eau visible non occupée (rivière non traversée)
+        for c, r in self._iter_visible_of(env, Config.WATER):
+            if self._is_open_water(env, c, r) and not self._is_cell_occupied(c, r) and self._can_reach(env, c, r):
+                return (c, r)
         return None
 
     def find_bridge_location_global(self, env):
@@ -210,38 +464,50 @@ class Agent:
         
         # Priorité 1: Trouver le pont le plus à droite et chercher de l'eau à sa droite
         rightmost_bridge = None
-        for r in range(rows):
-            for c in range(cols):
-                if env.grid[r][c] == Config.BRIDGE:
-                    if rightmost_bridge is None or c > rightmost_bridge[0]:
-                        rightmost_bridge = (c, r)
+        for c, r in self._iter_cells_of(env, Config.BRIDGE):
+            if rightmost_bridge is None or c > rightmost_bridge[0]:
+                rightmost_bridge = (c, r)
         
         if rightmost_bridge is not None:
             rx, ry = rightmost_bridge
             # Vérifier s'il y a de l'eau à droite
-            if rx + 1 < cols and env.grid[ry][rx + 1] == Config.WATER:
+            if rx + 1 < cols and self._is_open_water(env, rx + 1, ry):
                 return (rx + 1, ry)
         
-        # Priorité 2: Chercher de l'eau adjacente à n'importe quel pont (priorité droite)
-        for r in range(rows):
-            for c in range(cols):
-                if env.grid[r][c] == Config.BRIDGE:
-                    # D'abord à droite
-                    if c + 1 < cols and env.grid[r][c + 1] == Config.WATER:
-                        return (c + 1, r)
-                    # Puis autres directions
-                    for dx, dy in [(-1, 0), (0, -1), (0, 1)]:
-                        nx, ny = c + dx, r + dy
-                        if 0 <= nx < cols and 0 <= ny < rows:
-                            if env.grid[ny][nx] == Config.WATER:
-                                return (nx, ny)
-        
-        # Sinon, chercher une case d'eau au milieu de la carte
+        # Priorité 2: Chercher de l'eau adjacente à n'importe quel pont (priorité droite),
+        # hors des rivières déjà traversées
+        for c, r in self._iter_cells_of(env, Config.BRIDGE):
+            # D'abord à droite
+            if c + 1 < cols and self._is_open_water(env, c + 1, r):
+                return (c + 1, r)
+            # Puis autres directions
+            for dx, dy in [(-1, 0), (0, -1), (0, 1)]:
+                nx, ny = c + dx, r + dy
+                if 0 <= nx < cols and 0 <= ny < rows:
+                    if self._is_open_water(env, nx, ny):
+                        return (nx, ny)
+        
+        # Sinon, commencer la traversée la plus courte de la première rivière non pontée
+        # (départagée par la proximité du milieu de la carte)
         middle_row = rows // 2
+        for river in env.rivers:
+            if river.is_crossed():
+                continue
+            row = river.best_crossing_row(middle_row)
+            for c in river.row_cols[row]:
+                if env.grid[row][c] == Config.WATER:
+                    return (c, row)
+        
         # Chercher d'abord au milieu, puis s'éloigner progressivement
+        water = env.bitboards.layer(Config.WATER) if env.bitboards is not None else None
         for offset in range(rows):
             for r in [middle_row + offset, middle_row - offset]:
                 if 0 <= r < rows:
+                    if water is not None:
+                        # Bit de poids faible = case d'eau la plus à gauche
+                        if water[r]:
+                            return ((water[r] & -water[r]).bit_length() - 1, r)
+                        continue
                     for c in range(cols):
                         if env.grid[r][c] == Config.WATER:
                             return (c, r)
@@ -249,6 +515,10 @@ class Agent:
 
     def update(self, env, agents=None):
         """Met à jour l'agent selon son rôle"""
+        # Laisser passer un agent qui a réservé notre case (déplacement coopératif)
+        if env.reservations is not None and self._yield_to_planned(env):
+            return
+        
         # Vérifier si l'agent est bloqué
         is_ignoring = self._check_stuck(env)
         
@@ -257,14 +527,9 @@ class Agent:
             self.random_walk(env)
             return
         
-        if self.role == "gatherer":
-            self._update_gatherer(env)
-        elif self.role == "builder":
-            self._update_builder(env)
-        elif self.role == "manager":
-            self._update_manager(env, agents or [])
+        Agent._ROLE_UPDATES[self.role_code](self, env, agents or [])
 
-    def _update_gatherer(self, env):
+    def _update_gatherer(self, env, agents):
         """Logique du récolteur"""
         woodstock_x, woodstock_y = env.woodstock_pos
         
@@ -290,8 +555,8 @@ class Agent:
                 
                 if self.x == target_x and self.y == target_y:
                     if env.grid[target_y][target_x] == Config.WOOD:
-                        self.inventory = "wood"
-                        env.grid[target_y][target_x] = Config.LAND
+                        self._carry(env, "wood")
+                        env.harvest(target_x, target_y)
                         self.target = None
                         self.state = "returning"
             else:
@@ -305,15 +570,15 @@ class Agent:
             if self._is_visible(woodstock_x, woodstock_y):
                 self.move_towards(env, woodstock_x, woodstock_y)
                 if self.x == woodstock_x and self.y == woodstock_y:
-                    env.woodstock["wood"] += 1
-                    self.inventory = None
+                    env.deposit_wood()
+                    self._carry(env, None)
                     self.state = "idle"
             elif self.target:
                 self.move_towards(env, *self.target)
             else:
                 self.random_walk(env)
 
-    def _update_builder(self, env):
+    def _update_builder(self, env, agents):
         """Logique du constructeur"""
         woodstock_x, woodstock_y = env.woodstock_pos
         
@@ -326,12 +591,17 @@ class Agent:
             if env.woodstock["wood"] > 0 and self._is_visible(woodstock_x, woodstock_y):
                 self.move_towards(env, woodstock_x, woodstock_y)
                 
-                if self.x == woodstock_x and self.y == woodstock_y:
-                    env.woodstock["wood"] -= 1
-                    self.inventory = "wood"
+                if self.x == woodstock_x and self.y == woodstock_y and env.take_wood():
+                    self._carry(env, "wood")
                     self.target = None
             elif self.target:
                 self.move_towards(env, *self.target)
+            elif env.woodstock["wood"] == 0 and self._is_visible(woodstock_x, woodstock_y) \
+                    and abs(self.x - woodstock_x) + abs(self.y - woodstock_y) > 1 \
+                    and self._wait_for(env, EVENT_WOOD_DEPOSITED):
+                # Woodstock vide en vue : attendre un dépôt plutôt que d'errer
+                # (sans bloquer l'accès au woodstock)
+                pass
             else:
                 self.random_walk(env)
         else:
@@ -360,7 +630,7 @@ class Agent:
                 if abs(self.x - target_x) <= 1 and abs(self.y - target_y) <= 1:
                     success = env.add_bridge_section(target_y, target_x)
                     if success or env.grid[target_y][target_x] != Config.WATER:
-                        self.inventory = None
+                        self._carry(env, None)
                         self.target = None
                         self.state = "idle"
             else:
@@ -375,8 +645,7 @@ class Agent:
         if self._is_visible(arrival_x, arrival_y):
             self.move_towards(env, arrival_x, arrival_y)
             # Vérifier si on a atteint l'arrivée
-            if self.x == arrival_x and self.y == arrival_y:
-                env.arrival_reached = True
+            env.check_arrival(self.x, self.y)
         # Priorité 2: Si le pont est complet, trouver et traverser ce pont
         elif env.is_bridge_complete():
             # Trouver la position du pont complet
@@ -384,7 +653,7 @@ class Agent:
             if complete_bridge_pos:
                 bridge_row = complete_bridge_pos[1]
                 # Vérifier si on est déjà passé de l'autre côté du pont complet
-                if self._is_past_complete_bridge(env, bridge_row):
+                if self._is_past_complete_bridge(env, complete_bridge_pos):
                     # Reprendre la marche aléatoire après avoir traversé
                     self.random_walk(env)
                 else:
@@ -394,14 +663,9 @@ class Agent:
                         self.move_towards(env, self.x, bridge_row)
                     else:
                         # Ensuite traverser le pont (aller vers la droite du pont)
-                        cols = len(env.grid[0]) if env.grid else 0
-                        # Trouver la fin du pont (côté droit)
-                        end_bridge_x = complete_bridge_pos[0]
-                        for c in range(complete_bridge_pos[0], cols):
-                            if env.grid[bridge_row][c] == Config.BRIDGE:
-                                end_bridge_x = c
-                            else:
-                                break
+                        # La fin du pont (côté droit) est l'étendue précalculée de la rivière
+                        river = env.river_at(*complete_bridge_pos)
+                        end_bridge_x = river.spans[bridge_row][1]
                         self.move_towards(env, end_bridge_x + 1, bridge_row)
             else:
                 # Pas de pont trouvé, random walk
@@ -421,29 +685,65 @@ class Agent:
                 continue
 
             # Communiquer avec les gatherers
-            if other.role == "gatherer":
+            if other.role_code == ROLE_GATHERER:
                 if not other.inventory:
-                    # Donner la direction vers le bois le plus proche (sur toute la carte)
-                    target = self._find_nearest_resource_global(env, Config.WOOD)
+                    target = self._find_wood_for(env, other, agents)
                     if target:
-                        other.manager_hint = target
+                        self._give_hint(env, other, target)
                 else:
                     # Donner la direction vers le woodstock
-                    other.manager_hint = env.woodstock_pos
+                    self._give_hint(env, other, env.woodstock_pos)
 
             # Communiquer avec les builders
-            if other.role == "builder":
+            if other.role_code == ROLE_BUILDER:
                 if other.inventory:
                     # Donner la direction vers le pont le plus avancé (le plus à droite)
                     target = self.find_bridge_location_global(env)
                     if target:
-                        other.manager_hint = target
-                        other.target = target  # Forcer la cible immédiatement
+                        # Forcer la cible immédiatement
+                        self._give_hint(env, other, target, force_target=True)
                 else:
                     # Donner la direction vers le woodstock
                     if env.woodstock["wood"] > 0:
-                        other.manager_hint = env.woodstock_pos
+                        self._give_hint(env, other, env.woodstock_pos)
     
+    def _find_wood_for(self, env, gatherer, agents):
+        """
+        Arbre à indiquer à un récolteur : avec l'index de densité, celui des
+        arbres qu'il voit dont le voisinage est le plus boisé et n'est visé par
+        aucun autre récolteur ; sinon le bois le plus proche sur toute la carte.
+        """
+        if env.wood_density is not None:
+            candidates = [(c, r) for c, r in gatherer._iter_visible_of(env, Config.WOOD)
+                          if not gatherer._is_cell_occupied(c, r) and gatherer._can_reach(env, c, r)]
+            # Cibles des autres récolteurs en route vers un arbre
+            assigned = []
+            for other in agents:
+                if other is gatherer or other.role_code != ROLE_GATHERER or other.inventory:
+                    continue
+                aim = other.manager_hint or other.target
+                if aim is not None:
+                    assigned.append(aim)
+            target = env.wood_density.densest(candidates, (gatherer.x, gatherer.y),
+                                              Config.WOOD_PATCH_RADIUS, assigned)
+            if target is not None:
+                return target
+        return self._find_nearest_resource_global(env, Config.WOOD, gatherer)
+
+    def _give_hint(self, env, other, target, force_target=False):
+        """Transmet une direction à un autre agent (et le réveille s'il attend)"""
+        # Ne pas envoyer un agent vers une cible qu'il ne peut pas atteindre
+        if not other._can_reach(env, *target):
+            return
+        env.give_hint(other, target, force_target)
+
+    def _wait_for(self, env, event):
+        """Met l'agent en attente d'un événement si un ordonnanceur est actif"""
+        if env.scheduler is None:
+            return False
+        env.scheduler.wait_for(self, event)
+        return True
+
     def _is_past_bridge(self, env):
         """Vérifie si l'agent est sur le pont ou l'a traversé (à droite de la rivière)"""
         # Vérifier si on est sur une case de pont
@@ -455,74 +755,41 @@ class Agent:
                 return True
         return False
     
-    def _is_past_complete_bridge(self, env, bridge_row):
-        """Vérifie si l'agent a traversé le pont complet sur la ligne donnée"""
-        cols = len(env.grid[0]) if env.grid else 0
-        
-        # Trouver la colonne max d'eau
-        max_water_col = 0
-        for c in range(cols):
-            if env.grid[bridge_row][c] == Config.WATER or env.grid[bridge_row][c] == Config.BRIDGE:
-                max_water_col = max(max_water_col, c)
+    def _is_past_complete_bridge(self, env, bridge_pos):
+        """Vérifie si l'agent a traversé le pont complet commençant en bridge_pos"""
+        bridge_row = bridge_pos[1]
+        river = env.river_at(*bridge_pos)
+        if river is None:
+            return False
         
         # L'agent est passé s'il est à droite du pont ET sur la bonne ligne (ou proche)
-        return self.x > max_water_col and abs(self.y - bridge_row) <= 2
+        return self.x > river.spans[bridge_row][1] and abs(self.y - bridge_row) <= 2
     
     def _find_complete_bridge(self, env):
-        """Trouve la position d'entrée du pont complet (le plus proche de l'agent)"""
-        rows = len(env.grid)
-        cols = len(env.grid[0]) if env.grid else 0
-        
-        # Trouver les colonnes d'eau
-        water_cols = set()
-        for r in range(rows):
-            for c in range(cols):
-                if env.grid[r][c] == Config.WATER:
-                    water_cols.add(c)
-        
-        if not water_cols:
-            return None
-        
-        min_water_col = min(water_cols)
-        max_water_col = max(water_cols)
-        
-        # Trouver les lignes où le pont est complet
-        complete_bridge_rows = []
-        for r in range(rows):
-            row_complete = True
-            for c in range(min_water_col, max_water_col + 1):
-                if env.grid[r][c] == Config.WATER:
-                    row_complete = False
-                    break
-            if row_complete and any(env.grid[r][c] == Config.BRIDGE for c in range(min_water_col, max_water_col + 1)):
-                complete_bridge_rows.append(r)
-        
-        if not complete_bridge_rows:
-            return None
-        
-        # Trouver le pont complet le plus proche de l'agent
-        best_row = None
-        min_dist = float('inf')
-        for r in complete_bridge_rows:
-            dist = abs(self.y - r)
-            if dist < min_dist:
-                min_dist = dist
-                best_row = r
-        
-        # Retourner la position d'entrée du pont (première case de pont sur cette ligne)
-        if best_row is not None:
-            return (min_water_col, best_row)
-        
-        return None
+        """Trouve la position d'entrée du pont complet de la prochaine rivière à traverser"""
+        entry = None
+        # Les rivières sont triées de gauche à droite
+        for river in env.rivers:
+            row = river.nearest_complete_row(self.y)
+            if row is None:
+                return None
+            entry = (river.spans[row][0], row)
+            # Rivière pas encore traversée : c'est la prochaine
+            if self.x <= river.spans[row][1]:
+                return entry
+        
+        # Toutes les rivières sont traversées : retourner le dernier pont
+        return entry
     
     def _move_right_priority(self, env):
         """Déplacement avec priorité vers la droite"""
+        self._drop_plan(env)
         cols = len(env.grid[0]) if env.grid else 0
         rows = len(env.grid)
         
         # Priorité: droite, puis haut/bas aléatoire, puis gauche
         directions = [(1, 0)]  # Droite d'abord
-        if random.random() < 0.5:
+        if self.rng.random() < 0.5:
             directions.extend([(0, -1), (0, 1)])  # Haut puis bas
         else:
             directions.extend([(0, 1), (0, -1)])  # Bas puis haut
@@ -532,25 +799,25 @@ class Agent:
             nx, ny = self.x + dx, self.y + dy
             if self._is_walkable(env, nx, ny):
                 if not self._is_cell_occupied(nx, ny):
-                    self.x, self.y = nx, ny
-                    env.check_arrival(self.x, self.y)
+                    self._step_to(env, nx, ny)
                     return
         
         # Si aucune direction n'est possible, rester sur place
         pass
     
-    def _find_nearest_resource_global(self, env, resource_type):
-        """Trouve la ressource la plus proche sur toute la carte"""
-        rows = len(env.grid)
-        cols = len(env.grid[0]) if env.grid else 0
+    def _find_nearest_resource_global(self, env, resource_type, origin=None):
+        """Trouve la ressource la plus proche sur toute la carte (atteignable par l'agent origin si donné)"""
         min_dist = float('inf')
         nearest = None
 
-        for r in range(rows):
-            for c in range(cols):
-                if env.grid[r][c] == resource_type:
-                    dist = abs(self.x - c) + abs(self.y - r)
-                    if dist < min_dist:
-                        min_dist = dist
-                        nearest = (c, r)
+        for c, r in self._iter_cells_of(env, resource_type):
+            dist = abs(self.x - c) + abs(self.y - r)
+            if dist < min_dist:
+                if origin is not None and not origin._can_reach(env, c, r):
+                    continue
+                min_dist = dist
+                nearest = (c, r)
         return nearest
+
+    # Mise à jour par rôle, indexée par role_code
+    _ROLE_UPDATES = (_update_gatherer, _update_builder, _update_manager)
@@ -0,0 +1,94 @@
+"""Couches de bits du terrain (une par type de case)"""
+from environment import EVENT_CELL_CHANGED
+
+
+def iter_bits(bits):
+    """Indices des bits à 1, du plus faible au plus fort"""
+    while bits:
+        low = bits & -bits
+        yield low.bit_length() - 1
+        bits ^= low
+
+
+class TerrainBitboards:
+    """
+    Pour chaque type de terrain, un entier par ligne dont le bit x vaut 1
+    si la case (x, y) est de ce type. Les couches sont tenues à jour sur
+    EVENT_CELL_CHANGED ; les requêtes sur un losange ou une plage de
+    colonnes se font ligne par ligne avec un ET et un comptage de bits.
+    """
+
+    def __init__(self, env):
+        self.rows = env.rows
+        self.cols = env.cols
+        self.layers = {}  # valeur de terrain -> [bits de la ligne y]
+        for y, row in enumerate(env.grid):
+            for x, value in enumerate(row):
+                self.layer(value)[y] |= 1 << x
+        self._diamonds = {}  # rayon -> [(dy, demi-largeur, masque centré en demi-largeur)]
+        env.subscribe(EVENT_CELL_CHANGED, self._on_cell_changed)
+
+    def layer(self, value):
+        """Lignes de bits d'un type de terrain (créées vides au besoin)"""
+        bits = self.layers.get(value)
+        if bits is None:
+            bits = self.layers[value] = [0] * self.rows
+        return bits
+
+    def _on_cell_changed(self, data):
+        """Déplace le bit d'une case de l'ancienne couche vers la nouvelle"""
+        x, y, old, new = data
+        bit = 1 << x
+        self.layer(old)[y] &= ~bit
+        self.layer(new)[y] |= bit
+
+    def _diamond(self, radius):
+        """Masques précalculés des lignes d'un losange de rayon donné"""
+        rows = self._diamonds.get(radius)
+        if rows is None:
+            rows = []
+            for dy in range(-radius, radius + 1):
+                half = radius - abs(dy)
+                rows.append((dy, half, (1 << (2 * half + 1)) - 1))
+            self._diamonds[radius] = rows
+        return rows
+
+    def _diamond_rows(self, value, x, y, radius):
+        """(ligne, bits du type dans le losange) pour chaque ligne du losange dans la grille"""
+        layer = self.layer(value)
+        for dy, half, mask in self._diamond(radius):
+            r = y + dy
+            if not 0 <= r < self.rows:
+                continue
+            shift = x - half
+            row_mask = mask << shift if shift >= 0 else mask >> -shift
+            yield r, layer[r] & row_mask
+
+    def any_in_diamond(self, value, x, y, radius):
+        """Vrai si une case du type est à distance de Manhattan <= radius de (x, y)"""
+        return any(bits for _, bits in self._diamond_rows(value, x, y, radius))
+
+    def count_in_diamond(self, value, x, y, radius):
+        """Nombre de cases du type à distance de Manhattan <= radius de (x, y)"""
+        return sum(bits.bit_count() for _, bits in self._diamond_rows(value, x, y, radius))
+
+    def iter_diamond(self, value, x, y, radius):
+        """Cases (x, y) du type dans le losange, ligne par ligne puis de gauche à droite"""
+        for r, bits in self._diamond_rows(value, x, y, radius):
+            for c in iter_bits(bits):
+                yield c, r
+
+    def iter_cells(self, value):
+        """Toutes les cases (x, y) du type, ligne par ligne puis de gauche à droite"""
+        for r, bits in enumerate(self.layer(value)):
+            for c in iter_bits(bits):
+                yield c, r
+
+    def row_count(self, value, y, x0=0, x1=None):
+        """Nombre de cases du type sur la ligne y entre les colonnes x0 et x1 (incluses)"""
+        if x1 is None:
+            x1 = self.cols - 1
+        if not 0 <= y < self.rows or x1 < x0:
+            return 0
+        mask = ((1 << (x1 - x0 + 1)) - 1) << x0
+        return (self.layer(value)[y] & mask).bit_count()
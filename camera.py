@@ -0,0 +1,104 @@
+"""Caméra de la vue de la carte (zoom, déplacement, cases visibles)"""
+import math
+from config import Config
+
+
+class Camera:
+    """
+    Fenêtre sur la carte : (x, y) est la case (fractionnaire) affichée en
+    haut à gauche de la vue et cell la taille d'une case en pixels (le
+    zoom, éventuellement inférieur à 1 quand plusieurs cases tiennent dans
+    un pixel). Une carte plus petite que la vue est centrée.
+    """
+
+    def __init__(self, view_width, view_height, rows, cols):
+        self.view_width = view_width
+        self.view_height = view_height
+        self.rows = rows
+        self.cols = cols
+        self.x = 0.0
+        self.y = 0.0
+        self.cell = float(Config.CELL_SIZE)
+        self.fit()
+
+    def fit(self):
+        """Zoom pour voir toute la carte (sans dépasser CELL_SIZE)"""
+        if self.rows and self.cols:
+            self.cell = min(float(Config.CELL_SIZE), self.view_width / self.cols,
+                            self.view_height / self.rows)
+        self._clamp()
+
+    def _clamp(self):
+        """Garde la carte dans la vue (centrée sur un axe où elle est plus petite)"""
+        span_x = self.view_width / self.cell
+        span_y = self.view_height / self.cell
+        if self.cols <= span_x:
+            self.x = (self.cols - span_x) / 2
+        else:
+            self.x = min(max(self.x, 0.0), self.cols - span_x)
+        if self.rows <= span_y:
+            self.y = (self.rows - span_y) / 2
+        else:
+            self.y = min(max(self.y, 0.0), self.rows - span_y)
+
+    def pan(self, dx, dy):
+        """Déplace la vue de (dx, dy) pixels"""
+        self.x += dx / self.cell
+        self.y += dy / self.cell
+        self._clamp()
+
+    def zoom(self, factor, px=None, py=None):
+        """Multiplie le zoom par factor en gardant fixe le point (px, py) de la vue"""
+        if px is None:
+            px, py = self.view_width / 2, self.view_height / 2
+        wx, wy = self.to_world(px, py)
+        self.cell = min(max(self.cell * factor, Config.MIN_ZOOM), Config.MAX_ZOOM)
+        self.x = wx - px / self.cell
+        self.y = wy - py / self.cell
+        self._clamp()
+
+    def to_world(self, px, py):
+        """Position (fractionnaire) sur la carte d'un pixel de la vue"""
+        return self.x + px / self.cell, self.y + py / self.cell
+
+    def to_screen(self, x, y):
+        """Pixel de la vue du coin haut gauche de la case (x, y)"""
+        return int(math.floor((x - self.x) * self.cell)), int(math.floor((y - self.y) * self.cell))
+
+    def center_of(self, x, y):
+        """Pixel de la vue du centre de la case (x, y)"""
+        return (int((x + 0.5 - self.x) * self.cell), int((y + 0.5 - self.y) * self.cell))
+
+    def visible_range(self):
+        """Cases visibles (c0, r0, c1, r1), bornes hautes exclues"""
+        c0 = max(0, int(math.floor(self.x)))
+        r0 = max(0, int(math.floor(self.y)))
+        c1 = min(self.cols, int(math.ceil(self.x + self.view_width / self.cell)))
+        r1 = min(self.rows, int(math.ceil(self.y + self.view_height / self.cell)))
+        return c0, r0, c1, r1
+
+    def blit_cells(self, screen, surface):
+        """
+        Dessine la partie visible d'une surface d'un pixel par case, agrandie
+        au zoom courant (couleur moyenne des blocs quand une case fait moins
+        d'un pixel). Retourne le rectangle dessiné, ou None.
+        """
+        import pygame  # Seulement pour l'affichage : la simulation s'en passe
+
+        c0, r0, c1, r1 = self.visible_range()
+        if c1 <= c0 or r1 <= r0:
+            return None
+        left, top = self.to_screen(c0, r0)
+        right, bottom = self.to_screen(c1, r1)
+        area = surface.subsurface((c0, r0, c1 - c0, r1 - r0))
+        size = (max(1, right - left), max(1, bottom - top))
+        if self.cell < 1:
+            image = pygame.transform.smoothscale(area, size)
+        else:
+            image = pygame.transform.scale(area, size)
+        return screen.blit(image, (left, top))
+
+    def is_visible(self, x, y):
+        """Vrai si la case (x, y) est au moins en partie dans la vue"""
+        c0, r0, c1, r1 = self.visible_range()
+        return c0 <= x < c1 and r0 <= y < r1
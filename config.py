@@ -8,6 +8,23 @@ class Config:
     WINDOW_HEIGHT = HEIGHT + UI_HEIGHT
     CELL_SIZE = 20
     COLS, ROWS = WIDTH // CELL_SIZE, HEIGHT // CELL_SIZE
+    MIN_ZOOM, MAX_ZOOM = 0.1, 64.0  # Taille d'une case à l'écran (pixels), bornes du zoom
+    ZOOM_STEP = 1.25  # Facteur de zoom par cran de molette
+    GRID_LINE_ZOOM = 8  # Taille de case (pixels) à partir de laquelle bordures et inventaires sont dessinés
+    SHOW_PERFORMANCE = False  # Mesures de latence dans le panneau (touche P)
+    SHOW_MINIMAP = False  # Minimap de toute la carte en haut à droite (touche M)
+    MINIMAP_SIZE = (160, 80)  # Taille maximale de la minimap (pixels)
+    MINIMAP_AGENT_COLOR = (255, 255, 255)  # Couleur de la couche de densité des agents
+    MINIMAP_AGENT_ALPHA = 60  # Opacité ajoutée par agent dans un bloc de la minimap
+    TRAFFIC_HEATMAP = False  # Compte passages et blocages par case dès le début (sinon à la première touche H)
+    HEATMAP_DECAY = 0.995  # Facteur appliqué aux compteurs de la carte de chaleur à chaque tick (1 = aucun oubli)
+    HEATMAP_SCALE = 100.0  # Compression logarithmique des couleurs de la carte de chaleur
+    STREAM_TICK_RATE = 30.0  # Ticks par seconde de la simulation servie par stream.py (0 = au plus vite)
+    SESSION_SLICE_MS = 5  # Tranche de calcul d'une session par tour (session_server.py)
+    SESSION_CPU_QUOTA = None  # Temps de calcul maximal d'une session en secondes (None = illimité)
+    SESSION_IDLE_SECONDS = 300  # Inactivité avant qu'une session soit enregistrée sur disque
+    SESSIONS_DIR = "sessions"  # Dossier des sessions enregistrées
+    IDLE_WAIT_MS = 500  # Attente maximale d'une entrée quand la simulation est en pause ou terminée
     
     # Paramètres agents
     VISION_RANGE = 9  # Modifiable au runtime
@@ -35,7 +52,27 @@ class Config:
     RIVER_COL_START = COLS // 2 - 1
     RIVER_WIDTH = 4
     PREVENT_COLLISION = True  # Empêche 2 agents d'aller sur la même case
+    COOPERATIVE_PATHFINDING = False  # Chemins planifiés avec réservations espace-temps (avec PREVENT_COLLISION)
+    RESERVATION_WINDOW = 8  # Nombre de ticks planifiés et réservés à l'avance
+    HIERARCHICAL_PATHFINDING = False  # Chemins hiérarchiques (clusters + graphe abstrait) dans move_towards
+    CLUSTER_SIZE = 10  # Côté des clusters du planificateur hiérarchique
+    CONNECTIVITY_INDEX = False  # Écarte les cibles inatteignables (union-find des cases traversables)
+    BITBOARDS = False  # Recherches de terrain (vision, carte entière) sur des couches de bits par type de case
+    WOOD_DENSITY_DISPATCH = False  # Les managers envoient les récolteurs vers le bosquet visible le plus dense
+    WOOD_PATCH_RADIUS = 2  # Demi-côté du carré de comptage des arbres (WOOD_DENSITY_DISPATCH)
+    MAP_CACHE = False  # Précalculs de la carte enregistrés dans <carte>.cache/ et relus au chargement
+    STALL_DETECTION = False  # Arrête les exécutions perdues d'avance ou sans progrès (Simulation.stop_reason)
+    STALL_CHECK_INTERVAL = 50  # Ticks entre deux contrôles du détecteur
+    STALL_TICKS = 2000  # Ticks sans bois déplacé ni section posée avant l'arrêt (None = jamais)
+    ZOBRIST_HASH = False  # Empreinte 64 bits du monde tenue à jour à chaque changement (zobrist.py)
+    ZOBRIST_HISTORY = 10000  # Ticks dont l'empreinte est gardée (None = tous)
     STUCK_THRESHOLD = 3  # Nombre de tours avant qu'un agent bloqué change de direction (0 = désactivé)
+    TWO_PHASE_TICK = False  # Intentions calculées sur un instantané puis validées dans un ordre déterministe
+    INTENT_WORKERS = 1  # Threads de la phase d'intention (TWO_PHASE_TICK) ; GIL : aucune accélération, plus lent au-delà de 1
+    EVENT_SCHEDULER = False  # N'exécute que les agents dus (les agents en attente d'un événement sont sautés)
+    REWARD_WOOD = 1.0  # Récompense par bois déposé (gym_env)
+    REWARD_BRIDGE = 5.0  # Récompense par section de pont terminée (gym_env)
+    REWARD_ARRIVAL = 100.0  # Récompense de tous les agents à l'arrivée (gym_env)
     
     # Carte personnalisée (None = carte par défaut, sinon chemin vers le fichier)
     MAP_FILE = None #"./maps/test01_map.txt" # "./maps/example_map.txt"
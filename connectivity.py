@@ -0,0 +1,125 @@
+"""Index de connexité des cases traversables"""
+from environment import EVENT_CELL_CHANGED
+from pathfinding import is_walkable_value
+
+
+class ConnectivityIndex:
+    """
+    Union-find des cases traversables (4-voisinage).
+
+    Une case qui devient traversable (section de pont) est fusionnée avec
+    ses voisines en temps quasi constant. Le cas inverse n'existe pas dans
+    le jeu (les murs sont fixes) : il déclenche simplement une
+    reconstruction complète à la requête suivante.
+    """
+
+    def __init__(self, env):
+        self.env = env
+        self.rows = env.rows
+        self.cols = env.cols
+        self._parent = []
+        self._size = []
+        self._stale = True
+        env.subscribe(EVENT_CELL_CHANGED, self._on_cell_changed)
+        # Le cache de la carte décrit le terrain initial (aucun pont construit)
+        if env.map_cache is not None and not env.bridge_cells:
+            # Les deux tableaux sont relus ou reconstruits ensemble
+            parent = env.map_cache.load("connectivity_parent")
+            size = env.map_cache.load("connectivity_size")
+            cells = self.rows * self.cols
+            if parent is not None and size is not None and len(parent) == len(size) == cells:
+                self._parent, self._size = parent.tolist(), size.tolist()
+                self._stale = False
+            else:
+                self._rebuild()
+                env.map_cache.save("connectivity_parent", self._parent)
+                env.map_cache.save("connectivity_size", self._size)
+        else:
+            self._rebuild()
+
+    def _rebuild(self):
+        """Reconstruit l'union-find à partir de la grille"""
+        grid = self.env.grid
+        self._parent = [-1] * (self.rows * self.cols)
+        self._size = [1] * (self.rows * self.cols)
+        for y in range(self.rows):
+            for x in range(self.cols):
+                if is_walkable_value(grid[y][x]):
+                    self._parent[y * self.cols + x] = y * self.cols + x
+        for y in range(self.rows):
+            for x in range(self.cols):
+                if self._parent[y * self.cols + x] < 0:
+                    continue
+                if x + 1 < self.cols and self._parent[y * self.cols + x + 1] >= 0:
+                    self._union(y * self.cols + x, y * self.cols + x + 1)
+                if y + 1 < self.rows and self._parent[(y + 1) * self.cols + x] >= 0:
+                    self._union(y * self.cols + x, (y + 1) * self.cols + x)
+        self._stale = False
+
+    def _on_cell_changed(self, data):
+        """Met à jour l'index quand une case change de traversabilité"""
+        x, y, old, new = data
+        was_walkable, walkable = is_walkable_value(old), is_walkable_value(new)
+        if walkable and not was_walkable:
+            self._add(x, y)
+        elif was_walkable and not walkable:
+            self._stale = True
+
+    def _add(self, x, y):
+        """Ajoute une case traversable et la fusionne avec ses voisines"""
+        i = y * self.cols + x
+        self._parent[i] = i
+        self._size[i] = 1
+        for nx, ny in ((x + 1, y), (x - 1, y), (x, y + 1), (x, y - 1)):
+            if 0 <= nx < self.cols and 0 <= ny < self.rows:
+                j = ny * self.cols + nx
+                if self._parent[j] >= 0:
+                    self._union(i, j)
+
+    def _find(self, i):
+        """Racine de la région de l'indice i (avec compression de chemin)"""
+        parent = self._parent
+        root = i
+        while parent[root] != root:
+            root = parent[root]
+        while parent[i] != root:
+            parent[i], i = root, parent[i]
+        return root
+
+    def _union(self, i, j):
+        """Fusionne les régions de i et j (union par taille)"""
+        ri, rj = self._find(i), self._find(j)
+        if ri == rj:
+            return
+        if self._size[ri] < self._size[rj]:
+            ri, rj = rj, ri
+        self._parent[rj] = ri
+        self._size[ri] += self._size[rj]
+
+    def region(self, x, y):
+        """Identifiant de la région de la case (None si non traversable ou hors grille)"""
+        if self._stale:
+            self._rebuild()
+        if not (0 <= x < self.cols and 0 <= y < self.rows):
+            return None
+        i = y * self.cols + x
+        if self._parent[i] < 0:
+            return None
+        return self._find(i)
+
+    def is_reachable(self, start, target):
+        """
+        Vrai si target est atteignable depuis start. Une case non traversable
+        (eau) est atteignable si l'une des 8 cases qui la touchent l'est.
+        """
+        region = self.region(*start)
+        if region is None:
+            return False
+        tx, ty = target
+        if self.region(tx, ty) is not None:
+            return self.region(tx, ty) == region
+        for dx in (-1, 0, 1):
+            for dy in (-1, 0, 1):
+                if (dx or dy) and self.region(tx + dx, ty + dy) == region:
+                    return True
+        return False
@@ -0,0 +1,59 @@
+"""Densité de bois par table de sommes cumulées (image intégrale)"""
+import numpy as np
+from config import Config
+from environment import EVENT_CELL_CHANGED
+
+
+class WoodDensity:
+    """
+    Table de sommes cumulées des arbres : sat[y][x] est le nombre d'arbres
+    dans le rectangle [0, x) x [0, y). Le nombre d'arbres d'un rectangle
+    quelconque se lit en quatre accès ; la table est corrigée sur
+    EVENT_CELL_CHANGED quand une case devient ou cesse d'être un arbre.
+    """
+
+    def __init__(self, env):
+        self.rows = env.rows
+        self.cols = env.cols
+        wood = np.array([[cell == Config.WOOD for cell in row] for row in env.grid], dtype=np.int32)
+        self.sat = np.zeros((self.rows + 1, self.cols + 1), dtype=np.int32)
+        self.sat[1:, 1:] = wood.cumsum(axis=0).cumsum(axis=1)
+        env.subscribe(EVENT_CELL_CHANGED, self._on_cell_changed)
+
+    def _on_cell_changed(self, data):
+        """Répercute l'apparition ou la récolte d'un arbre sur les sommes en aval"""
+        x, y, old, new = data
+        delta = (new == Config.WOOD) - (old == Config.WOOD)
+        if delta:
+            self.sat[y + 1:, x + 1:] += delta
+
+    def count(self, x0, y0, x1, y1):
+        """Nombre d'arbres dans le rectangle [x0, x1] x [y0, y1] (bornes incluses, rognées)"""
+        x0, y0 = max(x0, 0), max(y0, 0)
+        x1, y1 = min(x1, self.cols - 1), min(y1, self.rows - 1)
+        if x1 < x0 or y1 < y0:
+            return 0
+        sat = self.sat
+        return int(sat[y1 + 1, x1 + 1] - sat[y0, x1 + 1] - sat[y1 + 1, x0] + sat[y0, x0])
+
+    def patch_count(self, x, y, radius):
+        """Nombre d'arbres dans le carré de demi-côté radius centré sur (x, y)"""
+        return self.count(x - radius, y - radius, x + radius, y + radius)
+
+    def densest(self, candidates, origin, radius, assigned=()):
+        """
+        Candidat (x, y) dont le carré de demi-côté radius contient le plus
+        d'arbres, en écartant les carrés où une position de assigned se
+        trouve déjà ; à densité égale, le plus proche de origin. None si
+        tous les candidats sont écartés.
+        """
+        ox, oy = origin
+        best = None
+        best_key = None
+        for x, y in candidates:
+            if any(abs(x - ax) <= radius and abs(y - ay) <= radius for ax, ay in assigned):
+                continue
+            key = (self.patch_count(x, y, radius), -(abs(x - ox) + abs(y - oy)))
+            if best_key is None or key > best_key:
+                best, best_key = (x, y), key
+        return best
@@ -1,8 +1,26 @@
 """Gestion de l'environnement du jeu"""
-import pygame
+import functools
 import random
 from config import Config
 from map_loader import MapLoader
+from river import River
+from map_cache import MapCache
+from camera import Camera
+
+# Événements émis par l'environnement (voir Environment.subscribe)
+EVENT_AGENT_MOVED = "agent_moved"  # donnée : (agent, ancien x, ancien y)
+EVENT_TREE_HARVESTED = "tree_harvested"  # donnée : (x, y) de l'arbre
+EVENT_WOOD_DEPOSITED = "wood_deposited"  # donnée : None
+EVENT_WOOD_WITHDRAWN = "wood_withdrawn"  # donnée : None
+EVENT_BRIDGE_PROGRESS = "bridge_progress"  # donnée : (x, y, bois posé sur la section)
+EVENT_BRIDGE_COMPLETED = "bridge_completed"  # donnée : (x, y) de la section
+EVENT_HINT_GIVEN = "hint_given"  # donnée : agent qui reçoit l'indication
+EVENT_ARRIVAL_REACHED = "arrival_reached"  # donnée : (x, y) de l'arrivée
+EVENT_CELL_CHANGED = "cell_changed"  # donnée : (x, y, ancienne valeur, nouvelle valeur)
+EVENT_AGENT_STUCK = "agent_stuck"  # donnée : (x, y) de l'agent bloqué
+EVENTS = (EVENT_AGENT_MOVED, EVENT_TREE_HARVESTED, EVENT_WOOD_DEPOSITED, EVENT_WOOD_WITHDRAWN,
+          EVENT_BRIDGE_PROGRESS, EVENT_BRIDGE_COMPLETED, EVENT_HINT_GIVEN, EVENT_ARRIVAL_REACHED,
+          EVENT_CELL_CHANGED, EVENT_AGENT_STUCK)
 
 class Environment:
     """Gère la grille de jeu, les ressources et le pont"""
@@ -13,6 +31,19 @@ class Environment:
         self.bridge_cells = []
         self.bridge_progress = {}
         self.bridge_row = None  # Ligne partagée pour la construction du pont
+        self._setup_events()
+        self.scheduler = None  # Ordonnanceur événementiel (optionnel)
+        self.reservations = None  # Table de réservations espace-temps (optionnelle)
+        self.planner = None  # Planificateur de chemins hiérarchique (optionnel)
+        self.connectivity = None  # Index de connexité des cases traversables (optionnel)
+        self.bitboards = None  # Couches de bits par type de terrain (optionnelles)
+        self.wood_density = None  # Sommes cumulées des arbres (optionnelles)
+        self.heatmap = None  # Compteurs de passages et de blocages par case (optionnels)
+        self.zobrist = None  # Empreinte de l'état du monde (optionnelle)
+        self.tick = 0  # Nombre de ticks simulés
+        self.map_path = None  # Fichier de la carte chargée (None = carte par défaut)
+        self.map_cache = None  # Précalculs enregistrés à côté de la carte (optionnel)
+        self._overview = None  # Un pixel par case, pour l'affichage (créée au premier dessin)
         
         # Charger la carte (personnalisée ou par défaut)
         map_path = map_file or Config.MAP_FILE
@@ -20,6 +51,18 @@ class Environment:
             self._load_custom_map(map_path)
         else:
             self._setup_default_map()
+        
+        if Config.MAP_CACHE and self.map_path:
+            self.map_cache = MapCache(self.map_path, self.grid, self.woodstock_pos, self.arrival_pos)
+        
+        # Analyse des rivières une seule fois au chargement
+        labels = self.map_cache.load("water_labels") if self.map_cache else None
+        if labels is not None:
+            self.water_labels, self.rivers = River.from_labels(labels.tolist(), self.grid)
+        else:
+            self.water_labels, self.rivers = River.analyse(self.grid)
+            if self.map_cache:
+                self.map_cache.save("water_labels", self.water_labels)
     
     def _load_custom_map(self, filepath):
         """Charge une carte personnalisée depuis un fichier"""
@@ -31,6 +74,7 @@ class Environment:
             return
         
         self.grid = grid
+        self.map_path = filepath
         
         # Stocker les dimensions
         self.rows = len(grid)
@@ -84,10 +128,102 @@ class Environment:
         self.grid[self.woodstock_pos[1]][self.woodstock_pos[0]] = Config.woodstock
         self.grid[self.arrival_pos[1]][self.arrival_pos[0]] = Config.ARRIVAL
 
+    def _setup_events(self):
+        """Tables d'abonnement aux événements (vides)"""
+        self.handlers = {}  # événement -> fonctions appelées à chaque émission avec la donnée
+        self.batch_handlers = {}  # événement -> fonctions appelées par flush_events avec les données du tick
+        self._batches = {}  # événement -> données émises depuis le dernier flush_events
+        self.observed = frozenset()  # Événements ayant au moins un abonné
+
+    def subscribe(self, event, handler, batched=False):
+        """
+        Abonne handler à un type d'événement (EVENT_*). Il est appelé avec la
+        donnée à chaque émission ou, si batched, une fois par tick avec la
+        liste des données émises pendant le tick (voir flush_events). Les
+        émetteurs fréquents (EVENT_AGENT_MOVED) ne construisent leur donnée
+        que si l'événement est dans observed.
+        """
+        if batched:
+            self.batch_handlers.setdefault(event, []).append(handler)
+            self._batches.setdefault(event, [])
+        else:
+            self.handlers.setdefault(event, []).append(handler)
+        self.observed = frozenset(self.handlers) | frozenset(self.batch_handlers)
+
+    def unsubscribe(self, event, handler):
+        """Retire un abonnement fait par subscribe"""
+        for table in (self.handlers, self.batch_handlers):
+            handlers = table.get(event)
+            if handlers is not None and handler in handlers:
+                handlers.remove(handler)
+                if not handlers:
+                    del table[event]
+        if event not in self.batch_handlers:
+            self._batches.pop(event, None)
+        self.observed = frozenset(self.handlers) | frozenset(self.batch_handlers)
+
+    def add_listener(self, listener):
+        """Abonne une fonction listener(event, data) à tous les événements (émissions immédiates)"""
+        for event in EVENTS:
+            self.subscribe(event, functools.partial(listener, event))
+
+    def emit(self, event, data=None):
+        """Notifie les abonnés d'un événement (ceux par lots au prochain flush_events)"""
+        handlers = self.handlers.get(event)
+        if handlers is not None:
+            for handler in handlers:
+                handler(data)
+        batch = self._batches.get(event)
+        if batch is not None:
+            batch.append(data)
+
+    def flush_events(self):
+        """Transmet aux abonnés par lots les événements émis depuis l'appel précédent"""
+        for event, batch in list(self._batches.items()):
+            if batch:
+                self._batches[event] = []
+                for handler in self.batch_handlers[event]:
+                    handler(batch)
+
+    def deposit_wood(self):
+        """Dépose une unité de bois dans le woodstock"""
+        self.woodstock["wood"] += 1
+        self.emit(EVENT_WOOD_DEPOSITED)
+
+    def take_wood(self):
+        """Retire une unité de bois du woodstock (False si vide)"""
+        if self.woodstock["wood"] <= 0:
+            return False
+        self.woodstock["wood"] -= 1
+        self.emit(EVENT_WOOD_WITHDRAWN)
+        return True
+
+    def set_cell(self, x, y, value):
+        """Modifie le terrain d'une case et notifie les abonnés"""
+        old = self.grid[y][x]
+        self.grid[y][x] = value
+        self.emit(EVENT_CELL_CHANGED, (x, y, old, value))
+
+    def harvest(self, x, y):
+        """Récolte l'arbre de la case (x, y), qui redevient de la terre"""
+        if self.grid[y][x] != Config.WOOD:
+            return False
+        self.set_cell(x, y, Config.LAND)
+        self.emit(EVENT_TREE_HARVESTED, (x, y))
+        return True
+
+    def give_hint(self, agent, target, force_target=False):
+        """Transmet une direction (x, y) à un agent et le réveille s'il attend"""
+        agent.manager_hint = target
+        if force_target:
+            agent.target = target
+        self.emit(EVENT_HINT_GIVEN, agent)
+
     def check_arrival(self, x, y):
         """Vérifie si l'agent a atteint l'arrivée"""
-        if (x, y) == self.arrival_pos:
+        if (x, y) == self.arrival_pos and not self.arrival_reached:
             self.arrival_reached = True
+            self.emit(EVENT_ARRIVAL_REACHED, (x, y))
 
     def add_bridge_section(self, row, col):
         """Ajoute une section de pont si assez de bois"""
@@ -103,65 +239,74 @@ class Environment:
             self.bridge_progress[key] = 0
         
         self.bridge_progress[key] += 1
+        self.emit(EVENT_BRIDGE_PROGRESS, (col, row, self.bridge_progress[key]))
         
         if self.bridge_progress[key] >= Config.WOOD_NEEDED_PER_BRIDGE_CELL:
-            self.grid[row][col] = Config.BRIDGE
+            self.set_cell(col, row, Config.BRIDGE)
             self.bridge_cells.append(key)
+            river = self.river_at(col, row)
+            if river is not None:
+                river.mark_bridged(col, row)
+            self.emit(EVENT_BRIDGE_COMPLETED, (col, row))
             return True
         return False
 
+    def river_at(self, x, y):
+        """Retourne la rivière contenant la case (x, y), ou None"""
+        if 0 <= y < self.rows and 0 <= x < self.cols:
+            label = self.water_labels[y][x]
+            if label >= 0:
+                return self.rivers[label]
+        return None
+
     def is_bridge_complete(self):
-        """Vérifie si le pont traverse toute la rivière (cherche une ligne complète de ponts)"""
-        rows = len(self.grid)
-        cols = len(self.grid[0]) if self.grid else 0
-        
-        # Trouver les colonnes d'eau
-        water_cols = set()
-        for r in range(rows):
-            for c in range(cols):
-                if self.grid[r][c] == Config.WATER:
-                    water_cols.add(c)
-        
-        if not water_cols:
-            return True  # Pas d'eau = pont "complet"
-        
-        min_water_col = min(water_cols)
-        max_water_col = max(water_cols)
-        
-        # Vérifier si une ligne a un pont complet traversant toute l'eau
-        for r in range(rows):
-            has_bridge = all(
-                self.grid[r][c] == Config.BRIDGE 
-                for c in range(min_water_col, max_water_col + 1)
-                if (r, c) in [(row, col) for row in range(rows) for col in range(cols) if self.grid[row][col] in [Config.WATER, Config.BRIDGE]]
-            )
-            # Simplification: vérifier si toutes les cases entre min et max water col sont des ponts
-            row_complete = True
-            for c in range(min_water_col, max_water_col + 1):
-                if self.grid[r][c] == Config.WATER:
-                    row_complete = False
-                    break
-            if row_complete and any(self.grid[r][c] == Config.BRIDGE for c in range(min_water_col, max_water_col + 1)):
-                return True
-        return False
+        """Vérifie si chaque rivière est traversée par une ligne complète de ponts"""
+        # Pas d'eau = pont "complet"
+        return all(river.is_crossed() for river in self.rivers)
+
+    def _overview_surface(self):
+        """Surface d'un pixel par case, tenue à jour sur EVENT_CELL_CHANGED"""
+        if self._overview is None:
+            import pygame  # Seulement pour l'affichage : la simulation s'en passe
 
-    def draw(self, screen):
-        """Dessine l'environnement"""
-        rows = len(self.grid)
-        cols = len(self.grid[0]) if self.grid else 0
-        
-        for r in range(rows):
-            for c in range(cols):
-                color = self.grid[r][c]
-                pygame.draw.rect(screen, color, 
-                               (c*Config.CELL_SIZE, r*Config.CELL_SIZE, 
-                                Config.CELL_SIZE, Config.CELL_SIZE))
-                pygame.draw.rect(screen, (0, 0, 0), 
-                               (c*Config.CELL_SIZE, r*Config.CELL_SIZE, 
-                                Config.CELL_SIZE, Config.CELL_SIZE), 1)
-                
-                # Indicateur visuel pour le woodstock
-                if (c, r) == self.woodstock_pos:
-                    pygame.draw.rect(screen, (255, 255, 255), 
-                                   (c*Config.CELL_SIZE, r*Config.CELL_SIZE, 
-                                    Config.CELL_SIZE, Config.CELL_SIZE), 3)
+            self._overview = pygame.Surface((self.cols, self.rows), 0, 32)
+            for r, row in enumerate(self.grid):
+                for c, color in enumerate(row):
+                    self._overview.set_at((c, r), color)
+            self.subscribe(EVENT_CELL_CHANGED, self._update_overview)
+        return self._overview
+
+    def _update_overview(self, data):
+        x, y, _, new = data
+        self._overview.set_at((x, y), new)
+
+    def draw(self, screen, camera=None):
+        """Dessine les cases visibles dans la vue de camera (toute la carte à CELL_SIZE par défaut)"""
+        import pygame
+
+        if camera is None:
+            camera = Camera(self.cols * Config.CELL_SIZE, self.rows * Config.CELL_SIZE, self.rows, self.cols)
+        # Cases visibles agrandies depuis la surface d'un pixel par case
+        drawn = camera.blit_cells(screen, self._overview_surface())
+        if drawn is None:
+            return
+        c0, r0, c1, r1 = camera.visible_range()
+        left, top = camera.to_screen(c0, r0)
+        right, bottom = camera.to_screen(c1, r1)
+        
+        # Bordures des cases (2 pixels entre deux cases) quand le zoom le permet
+        if camera.cell >= Config.GRID_LINE_ZOOM:
+            for c in range(c0, c1 + 1):
+                x = camera.to_screen(c, r0)[0]
+                pygame.draw.rect(screen, (0, 0, 0), (x - 1, top, 2, bottom - top))
+            for r in range(r0, r1 + 1):
+                y = camera.to_screen(c0, r)[1]
+                pygame.draw.rect(screen, (0, 0, 0), (left, y - 1, right - left, 2))
+        
+        # Indicateur visuel pour le woodstock
+        wx, wy = self.woodstock_pos
+        if camera.is_visible(wx, wy):
+            x, y = camera.to_screen(wx, wy)
+            x1, y1 = camera.to_screen(wx + 1, wy + 1)
+            width = max(1, round(3 * camera.cell / Config.CELL_SIZE))
+            pygame.draw.rect(screen, (255, 255, 255), (x, y, max(1, x1 - x), max(1, y1 - y)), width)
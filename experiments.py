@@ -0,0 +1,208 @@
+"""Exécution de séries de simulations avec cache des résultats"""
+import argparse
+import contextlib
+import glob
+import hashlib
+import json
+import os
+import random
+import sqlite3
+import time
+from config import Config
+from simulation import Simulation
+import agent as agent_module
+
+DEFAULT_DB = "results.sqlite"
+DEFAULT_MAX_TICKS = 5000
+
+_code_version = None
+
+
+def code_version():
+    """Empreinte des sources du projet (tout changement de code invalide le cache)"""
+    global _code_version
+    if _code_version is None:
+        digest = hashlib.sha256()
+        root = os.path.dirname(os.path.abspath(__file__))
+        for path in sorted(glob.glob(os.path.join(root, "*.py"))):
+            digest.update(os.path.basename(path).encode())
+            with open(path, "rb") as f:
+                digest.update(f.read())
+        _code_version = digest.hexdigest()
+    return _code_version
+
+
+def config_snapshot():
+    """Configuration effective : attributs de Config et portée de vision courante"""
+    values = {name: getattr(Config, name) for name in dir(Config)
+              if not name.startswith("_") and not callable(getattr(Config, name))}
+    values["vision_range"] = agent_module.vision_range
+    return values
+
+
+@contextlib.contextmanager
+def config_overrides(values):
+    """Modifie temporairement des attributs de Config"""
+    previous = {name: getattr(Config, name) for name in values}
+    for name, value in values.items():
+        setattr(Config, name, value)
+    try:
+        yield
+    finally:
+        for name, value in previous.items():
+            setattr(Config, name, value)
+
+
+def experiment_key(map_file, seed, max_ticks):
+    """Clé de contenu d'une exécution : carte, graine, configuration et code"""
+    map_path = map_file or Config.MAP_FILE
+    if map_path:
+        with open(map_path, "rb") as f:
+            map_digest = hashlib.sha256(f.read()).hexdigest()
+    else:
+        map_digest = "default"
+    payload = json.dumps({
+        "map": map_digest,
+        "seed": seed,
+        "max_ticks": max_ticks,
+        "config": config_snapshot(),
+        "code": code_version(),
+    }, sort_keys=True, default=repr)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class ResultStore:
+    """Résultats de simulation dans SQLite, indexés par experiment_key"""
+
+    def __init__(self, path=DEFAULT_DB):
+        self.path = path
+        self.db = sqlite3.connect(path)
+        self.db.execute("""
+            CREATE TABLE IF NOT EXISTS results (
+                key TEXT PRIMARY KEY,
+                map TEXT,
+                seed INTEGER,
+                config TEXT,
+                finished INTEGER,
+                ticks INTEGER,
+                wood INTEGER,
+                bridges INTEGER,
+                series TEXT,
+                created REAL,
+                reason TEXT
+            )""")
+        columns = [row[1] for row in self.db.execute("PRAGMA table_info(results)")]
+        if "reason" not in columns:
+            # Base créée avant l'enregistrement des raisons d'arrêt
+            self.db.execute("ALTER TABLE results ADD COLUMN reason TEXT")
+        self.db.commit()
+
+    def close(self):
+        self.db.close()
+
+    def get(self, key):
+        """Résultat enregistré pour la clé (None si absent)"""
+        row = self.db.execute(
+            "SELECT map, seed, finished, reason, ticks, wood, bridges, series FROM results WHERE key = ?",
+            (key,)).fetchone()
+        if row is None:
+            return None
+        map_file, seed, finished, reason, ticks, wood, bridges, series = row
+        return {
+            "key": key,
+            "map": map_file,
+            "seed": seed,
+            "finished": bool(finished),
+            "reason": reason,
+            "ticks": ticks,
+            "wood": wood,
+            "bridges": bridges,
+            "series": json.loads(series) if series is not None else None,
+        }
+
+    def put(self, key, result):
+        """Enregistre (ou remplace) le résultat d'une exécution"""
+        series = result.get("series")
+        self.db.execute(
+            "INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (key, result["map"], result["seed"], json.dumps(config_snapshot(), sort_keys=True, default=repr),
+             int(result["finished"]), result["ticks"], result["wood"], result["bridges"],
+             json.dumps(series) if series is not None else None, time.time(), result["reason"]))
+        self.db.commit()
+
+
+def simulate(map_file=None, seed=0, max_ticks=DEFAULT_MAX_TICKS, series=False):
+    """Exécute une simulation et retourne ses métriques (et séries par tick si demandé)"""
+    random.seed(seed)
+    simulation = Simulation(map_file)
+    env = simulation.env
+    history = {"wood": [], "bridges": []} if series else None
+    while not simulation.stopped and simulation.tick < max_ticks:
+        simulation.step()
+        if history is not None:
+            history["wood"].append(env.woodstock["wood"])
+            history["bridges"].append(len(env.bridge_cells))
+    return {
+        "map": map_file or Config.MAP_FILE,
+        "seed": seed,
+        "finished": simulation.finished,
+        "reason": simulation.stop_reason or "max_ticks",
+        "ticks": simulation.tick,
+        "wood": env.woodstock["wood"],
+        "bridges": len(env.bridge_cells),
+        "series": history,
+    }
+
+
+def run_experiment(store, map_file=None, seed=0, max_ticks=DEFAULT_MAX_TICKS, series=False):
+    """Résultat d'une exécution, lu dans le cache ou simulé puis enregistré"""
+    key = experiment_key(map_file, seed, max_ticks)
+    result = store.get(key)
+    if result is not None and (not series or result["series"] is not None):
+        result["cached"] = True
+        return result
+    result = simulate(map_file, seed, max_ticks, series)
+    store.put(key, result)
+    result["key"] = key
+    result["cached"] = False
+    return result
+
+
+def run_sweep(store, map_files=(None,), seeds=range(8), variants=({},),
+              max_ticks=DEFAULT_MAX_TICKS, series=False):
+    """
+    Toutes les combinaisons carte x variante de Config x graine ; seules les
+    combinaisons absentes du cache sont simulées.
+    """
+    results = []
+    for map_file in map_files:
+        for variant in variants:
+            with config_overrides(variant):
+                for seed in seeds:
+                    result = run_experiment(store, map_file, seed, max_ticks, series)
+                    result["variant"] = variant
+                    results.append(result)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Série de simulations avec cache des résultats")
+    parser.add_argument("--map", action="append", dest="maps", help="Fichier de carte (répétable)")
+    parser.add_argument("--seeds", type=int, default=8, help="Nombre de graines (0..N-1)")
+    parser.add_argument("--max-ticks", type=int, default=DEFAULT_MAX_TICKS)
+    parser.add_argument("--db", default=DEFAULT_DB, help="Base SQLite des résultats")
+    args = parser.parse_args()
+
+    store = ResultStore(args.db)
+    results = run_sweep(store, args.maps or [None], range(args.seeds), max_ticks=args.max_ticks)
+    store.close()
+    for result in results:
+        status = "cache" if result["cached"] else "simulé"
+        print(f"{result['map'] or 'défaut'} graine {result['seed']}: "
+              f"{result['ticks']} ticks, fin={result['reason']} ({status})")
+    new = sum(not result["cached"] for result in results)
+    print(f"{len(results)} résultats, {new} simulés")
+
+
+if __name__ == "__main__":
+    main()
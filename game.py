@@ -1,65 +1,59 @@
 """Classe principale du jeu"""
+import time
 import pygame
 from config import Config
-from environment import Environment
-from agent import Agent
+from simulation import Simulation
 from renderer import Renderer
 from input_handler import InputHandler
+from metrics import LatencyHistogram
+from camera import Camera
+from minimap import Minimap
+from heatmap import TrafficHeatmap
 
 class Game:
     """Classe principale gérant la simulation"""
     
-    def __init__(self):
+    def __init__(self, map_file=None, simulation=None):
         pygame.init()
         self.clock = pygame.time.Clock()
         self.font = pygame.font.Font(None, 28)
         
         self.renderer = Renderer(self.font)
-        self.env = None
-        self.agents = []
+        self.simulation = simulation or Simulation(map_file)
         self.state = {
             'running': True,
             'paused': False,
             'reset': False,
-            'speed': 10
+            'speed': 10,
+            'performance': Config.SHOW_PERFORMANCE,
+            'minimap': Config.SHOW_MINIMAP,
+            'heatmap': None  # Carte de chaleur affichée ("visits", "stuck" ou None)
         }
-        
-        self.reset_simulation()
+        self.frame_latency = LatencyHistogram()  # Durée réelle de chaque image
+        self.minimap = None  # Créée au premier affichage (et pour chaque nouvel environnement)
         
         # Créer la fenêtre après avoir chargé l'environnement pour adapter la taille
         self._resize_window()
     
     def _resize_window(self):
-        """Redimensionne la fenêtre en fonction de la carte"""
-        width = self.env.cols * Config.CELL_SIZE
-        height = self.env.rows * Config.CELL_SIZE + Config.UI_HEIGHT
-        self.screen = pygame.display.set_mode((width, height))
+        """Crée la fenêtre (taille fixe) et une caméra qui montre toute la carte"""
+        self.screen = pygame.display.set_mode((Config.WIDTH, Config.WINDOW_HEIGHT))
         pygame.display.set_caption("Multi-Agent Bridge Builder")
+        self.camera = Camera(Config.WIDTH, Config.HEIGHT, self.env.rows, self.env.cols)
     
+    @property
+    def env(self):
+        """Environnement de la simulation en cours"""
+        return self.simulation.env
+
+    @property
+    def agents(self):
+        """Agents de la simulation en cours"""
+        return self.simulation.agents
+
     def reset_simulation(self):
         """Réinitialise la simulation"""
-        self.env = Environment()
-        self.agents = []
-        
-        rows = self.env.rows
-        cols = self.env.cols
-        
-        # Récolteurs (positions adaptées à la taille de la carte)
-        for i in range(Config.NUM_GATHERERS):
-            y = min(2 + i * 2, rows - 1)
-            self.agents.append(Agent(min(2, cols - 1), y, "gatherer"))
-        # Constructeurs
-        for i in range(Config.NUM_BUILDERS):
-            y = min(2 + i * 2, rows - 1)
-            self.agents.append(Agent(min(3, cols - 1), y, "builder"))
-        # Chefs de projet (managers)
-        for i in range(Config.NUM_MANAGERS):
-            y = min(rows // 2 + i * 2, rows - 1)
-            self.agents.append(Agent(min(4, cols - 1), y, "manager"))
-        
-        # Mettre à jour la liste partagée des agents pour la détection de collision
-        Agent.all_agents = self.agents
-        
+        self.simulation.reset()
         self.state['reset'] = False
     
     def update(self):
@@ -67,35 +61,81 @@ class Game:
         if self.state['reset']:
             self.reset_simulation()
         
-        if not self.state['paused'] and not self.env.arrival_reached:
-            # Le manager s'exécute EN PREMIER pour distribuer les hints
-            for agent in self.agents:
-                if agent.role == "manager":
-                    agent.update(self.env, self.agents)
-            
-            # Ensuite les autres agents
-            for agent in self.agents:
-                if agent.role != "manager":
-                    agent.update(self.env, self.agents)
+        if not self.state['paused']:
+            self.simulation.step()
     
     def draw(self):
         """Dessine tout"""
+        start = time.perf_counter()
         self.screen.fill((50, 50, 50))
-        self.env.draw(self.screen)
-        self.renderer.draw_agents(self.screen, self.agents)
+        # La carte ne déborde pas sur le panneau
+        self.screen.set_clip((0, 0, Config.WIDTH, Config.HEIGHT))
+        self.env.draw(self.screen, self.camera)
+        if self.state['heatmap']:
+            self._draw_heatmap()
+        self.renderer.draw_agents(self.screen, self.agents, self.camera)
+        if self.state['minimap']:
+            self._draw_minimap()
+        self.screen.set_clip(None)
         self.renderer.draw_ui(self.screen, self.env, self.state['speed'])
+        if self.state['performance']:
+            self.renderer.draw_performance(self.screen, self.simulation.tick_latency,
+                                           self.frame_latency, len(self.agents))
         self.renderer.draw_instructions(self.screen)
         pygame.display.flip()
+        self.frame_latency.record(time.perf_counter() - start)
     
+    def _is_idle(self):
+        """Vrai si rien ne change sans intervention (pause, ou exécution terminée : arrivée ou détecteur de blocage)"""
+        return (self.state['paused'] or self.simulation.stopped) and not self.state['reset']
+
+    def _wait_events(self):
+        """Attend une entrée ou un événement de fenêtre (au plus IDLE_WAIT_MS)"""
+        event = pygame.event.wait(Config.IDLE_WAIT_MS)
+        if event.type == pygame.NOEVENT:
+            return []
+        return [event] + pygame.event.get()
+
+    def _draw_heatmap(self):
+        """Carte de chaleur par-dessus le terrain (comptage démarré au premier affichage)"""
+        if self.env.heatmap is None:
+            self.env.heatmap = TrafficHeatmap(self.env)
+        kind = self.state['heatmap']
+        self.camera.blit_cells(self.screen, self.env.heatmap.surface(kind))
+        self.renderer.draw_heatmap_label(self.screen, kind)
+
+    def _draw_minimap(self):
+        """Minimap en haut à droite de la vue"""
+        if self.minimap is None or self.minimap.env is not self.env:
+            self.minimap = Minimap(self.env, *Config.MINIMAP_SIZE)
+        position = (Config.WIDTH - self.minimap.size[0] - 10, 10)
+        self.minimap.draw(self.screen, position, self.agents, self.camera)
+
     def run(self):
         """Boucle principale du jeu"""
+        dirty = True  # Une image reste à dessiner
         while self.state['running']:
-            events = pygame.event.get()
-            self.state['running'] = InputHandler.handle_events(events, self.state)
+            if self._is_idle() and not dirty:
+                # En pause ou terminé : dormir jusqu'à la prochaine entrée
+                events = self._wait_events()
+                if not events:
+                    continue
+            else:
+                events = pygame.event.get()
+            self.state['running'] = InputHandler.handle_events(events, self.state, self.camera)
             
             self.update()
             self.draw()
+            dirty = False
             
-            self.clock.tick(self.state['speed'])
+            if not self._is_idle():
+                self.clock.tick(self.state['speed'])
         
+        self.close()
+
+    def close(self):
+        """Affiche les mesures (si activées) et ferme pygame"""
+        if self.state['performance']:
+            print(self.simulation.tick_latency.format("Tick"))
+            print(self.frame_latency.format("Image"))
         pygame.quit()
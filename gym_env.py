@@ -0,0 +1,202 @@
+"""Interface reset/step (style Gym) pour entraîner des politiques d'agents"""
+import random
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from config import Config
+from environment import EVENT_CELL_CHANGED, EVENT_WOOD_DEPOSITED, EVENT_BRIDGE_COMPLETED
+from simulation import Simulation
+from batch import TERRAIN_CODES
+from pathfinding import MOVES
+import agent as agent_module
+from agent import ROLE_GATHERER, ROLE_BUILDER, ROLE_MANAGER
+
+# Actions (les déplacements suivent l'ordre de pathfinding.MOVES)
+ACTION_STAY = 0
+ACTION_RIGHT = 1
+ACTION_LEFT = 2
+ACTION_DOWN = 3
+ACTION_UP = 4
+ACTION_INTERACT = 5  # Récolter, déposer, prendre du bois ou construire selon le rôle
+ACTION_AUTO = 6      # Comportement habituel de l'agent (Agent.update)
+NUM_ACTIONS = 7
+
+# Code des cases hors de la grille dans les observations
+OUTSIDE = -1
+
+
+class MultiAgentEnv:
+    """
+    Simulation sans affichage pilotée action par action.
+
+    Chaque agent observe le carré (2v+1) x (2v+1) centré sur lui, v étant la
+    portée de vision ; vision_mask sélectionne le losange que parcourt
+    Agent._iter_visible_cells. Les observations sont des vues sur deux
+    tableaux bordés maintenus en place (terrain mis à jour sur
+    EVENT_CELL_CHANGED, occupation réécrite à chaque step) : aucune copie
+    n'est faite, elles reflètent donc l'état courant jusqu'au step suivant.
+
+    Récompenses par agent : REWARD_WOOD par bois déposé, REWARD_BRIDGE par
+    section de pont terminée (à l'agent qui agit), REWARD_ARRIVAL à tous
+    quand l'arrivée est atteinte.
+    """
+
+    def __init__(self, map_file=None, max_ticks=None):
+        self.max_ticks = max_ticks
+        self.simulation = Simulation(map_file)
+        self._acting = None
+        self._rewards = None
+        self._setup()
+
+    @property
+    def env(self):
+        return self.simulation.env
+
+    @property
+    def agents(self):
+        return self.simulation.agents
+
+    def reset(self, seed=None):
+        """Nouvel épisode ; retourne (observations, info)"""
+        if seed is not None:
+            random.seed(seed)
+        self.simulation.reset()
+        self._setup()
+        return self.observe(), self._info()
+
+    def _setup(self):
+        """Construit les tableaux d'observation et s'abonne aux événements"""
+        env = self.env
+        self.roles = np.array([a.role_code for a in self.agents], dtype=np.int8)
+        self._rewards = np.zeros(len(self.agents), dtype=np.float32)
+        self._pad = None
+        env.subscribe(EVENT_CELL_CHANGED, self._on_cell_changed)
+        env.subscribe(EVENT_WOOD_DEPOSITED, self._on_wood_deposited)
+        env.subscribe(EVENT_BRIDGE_COMPLETED, self._on_bridge_completed)
+        # Ordre d'exécution de Simulation : managers d'abord
+        self.order = [i for i, a in enumerate(self.agents) if a.role_code == ROLE_MANAGER] + \
+                     [i for i, a in enumerate(self.agents) if a.role_code != ROLE_MANAGER]
+        self._build_layers()
+
+    def _build_layers(self):
+        """(Re)crée les couches bordées pour la portée de vision courante"""
+        env = self.env
+        pad = agent_module.vision_range
+        self._pad = pad
+        self.terrain = np.full((env.rows + 2 * pad, env.cols + 2 * pad), OUTSIDE, dtype=np.int8)
+        self.terrain[pad:pad + env.rows, pad:pad + env.cols] = \
+            [[TERRAIN_CODES[cell] for cell in row] for row in env.grid]
+        # Occupation : code de rôle + 1 (0 = libre)
+        self.occupancy = np.zeros_like(self.terrain)
+        size = 2 * pad + 1
+        self._terrain_windows = sliding_window_view(self.terrain, (size, size))
+        self._occupancy_windows = sliding_window_view(self.occupancy, (size, size))
+        offsets = np.arange(size) - pad
+        self.vision_mask = np.abs(offsets)[:, None] + np.abs(offsets)[None, :] <= pad
+
+    def _on_cell_changed(self, data):
+        """Tient la couche de terrain à jour"""
+        x, y, _, new = data
+        self.terrain[y + self._pad, x + self._pad] = TERRAIN_CODES[new]
+
+    def _on_wood_deposited(self, data):
+        """Récompense l'agent qui dépose du bois"""
+        if self._acting is not None:
+            self._rewards[self._acting] += Config.REWARD_WOOD
+
+    def _on_bridge_completed(self, data):
+        """Récompense l'agent qui termine une section de pont"""
+        if self._acting is not None:
+            self._rewards[self._acting] += Config.REWARD_BRIDGE
+
+    def observe(self):
+        """
+        Observations de tous les agents : listes de vues "terrain" et "agents"
+        (fenêtres de vision), et tableaux "position", "inventory", "role".
+        """
+        if self._pad != agent_module.vision_range:
+            self._build_layers()
+        positions = np.array([(a.x, a.y) for a in self.agents], dtype=np.int32).reshape(-1, 2)
+        self.occupancy.fill(0)
+        self.occupancy[positions[:, 1] + self._pad, positions[:, 0] + self._pad] = self.roles + 1
+        # La fenêtre d'origine (y, x) du tableau bordé est centrée sur la case (x, y)
+        return {
+            "terrain": [self._terrain_windows[y, x] for x, y in positions],
+            "agents": [self._occupancy_windows[y, x] for x, y in positions],
+            "position": positions,
+            "inventory": np.array([a.inventory is not None for a in self.agents]),
+            "role": self.roles,
+        }
+
+    def _info(self):
+        env = self.env
+        return {"tick": env.tick, "wood": env.woodstock["wood"], "bridges": len(env.bridge_cells),
+                "reason": self.simulation.stop_reason}
+
+    def step(self, actions):
+        """
+        Applique une action par agent (dans l'ordre de Simulation) et avance
+        d'un tick ; retourne (observations, récompenses, terminé, tronqué, info).
+        """
+        env = self.env
+        self._rewards = np.zeros(len(self.agents), dtype=np.float32)
+        if not self.simulation.stopped:
+            for i in self.order:
+                self._acting = i
+                self._apply(self.agents[i], actions[i])
+                if env.arrival_reached:
+                    break
+            self._acting = None
+            self.simulation.end_tick()
+        terminated = env.arrival_reached
+        if terminated:
+            self._rewards += Config.REWARD_ARRIVAL
+        # Tronqué : limite de ticks atteinte ou exécution arrêtée par le détecteur de blocage
+        limit = self.max_ticks is not None and env.tick >= self.max_ticks
+        truncated = (limit or self.simulation.stopped) and not terminated
+        return self.observe(), self._rewards, terminated, truncated, self._info()
+
+    def _apply(self, agent, action):
+        """Traduit une action en primitives de l'agent et de l'environnement"""
+        env = self.env
+        if action == ACTION_AUTO:
+            agent.update(env, self.agents)
+        elif ACTION_RIGHT <= action <= ACTION_UP:
+            dx, dy = MOVES[action - ACTION_RIGHT]
+            nx, ny = agent.x + dx, agent.y + dy
+            if agent._is_walkable(env, nx, ny) and not agent._is_cell_occupied(nx, ny):
+                agent._step_to(env, nx, ny)
+        elif action == ACTION_INTERACT:
+            self._interact(agent)
+
+    def _interact(self, agent):
+        """Action contextuelle : récolte, dépôt, retrait ou construction"""
+        env = self.env
+        at_woodstock = (agent.x, agent.y) == env.woodstock_pos
+        if agent.role_code == ROLE_GATHERER:
+            if agent.inventory and at_woodstock:
+                env.deposit_wood()
+                agent._carry(env, None)
+            elif not agent.inventory:
+                cell = self._adjacent(agent, Config.WOOD, diagonal=False)
+                if cell is not None and env.harvest(*cell):
+                    agent._carry(env, "wood")
+        elif agent.role_code == ROLE_BUILDER:
+            if not agent.inventory and at_woodstock and env.take_wood():
+                agent._carry(env, "wood")
+            elif agent.inventory:
+                # Même portée que _update_builder : l'eau à une case, diagonales comprises
+                cell = self._adjacent(agent, Config.WATER, diagonal=True)
+                if cell is not None and env.add_bridge_section(cell[1], cell[0]):
+                    agent._carry(env, None)
+
+    def _adjacent(self, agent, value, diagonal):
+        """Première case de ce type sur l'agent ou à côté (ordre de MOVES), ou None"""
+        env = self.env
+        steps = ((0, 0),) + MOVES
+        if diagonal:
+            steps += ((1, 1), (1, -1), (-1, 1), (-1, -1))
+        for dx, dy in steps:
+            x, y = agent.x + dx, agent.y + dy
+            if 0 <= x < env.cols and 0 <= y < env.rows and env.grid[y][x] == value:
+                return x, y
+        return None
@@ -0,0 +1,84 @@
+"""Carte de chaleur des passages et des blocages d'agents"""
+import numpy as np
+from config import Config
+from environment import EVENT_AGENT_STUCK
+
+HEATMAP_KINDS = ("visits", "stuck")
+
+
+def _color_table():
+    """256 couleurs RGBA du bleu transparent (0) au rouge opaque (255)"""
+    t = np.linspace(0.0, 1.0, 256)
+    table = np.empty((256, 4), dtype=np.uint8)
+    table[:, 0] = 255 * t
+    table[:, 1] = 255 * (1 - np.abs(2 * t - 1))
+    table[:, 2] = 255 * (1 - t)
+    table[:, 3] = np.where(t > 0, 60 + 160 * t, 0)
+    return table
+
+
+class TrafficHeatmap:
+    """
+    Compteurs par case du nombre de ticks passés par les agents (visits) et
+    des blocages détectés par Agent._check_stuck (stuck).
+
+    La décroissance (HEATMAP_DECAY par tick) est paresseuse : au lieu de
+    multiplier les compteurs à chaque tick, le poids des nouveaux
+    échantillons croît de 1 / decay et les valeurs sont divisées par ce
+    poids à la lecture. La normalisation et la mise en couleur ne sont
+    faites qu'à l'affichage, au plus une fois par tick.
+    """
+
+    def __init__(self, env):
+        self.visits = np.zeros((env.rows, env.cols))
+        self.stuck = np.zeros((env.rows, env.cols))
+        self.decay = Config.HEATMAP_DECAY
+        self._weight = 1.0  # Poids d'un échantillon enregistré au tick courant
+        self._version = 0  # Incrémenté à chaque tick enregistré
+        self._surfaces = {}  # type -> (version, surface colorée)
+        self._colors = _color_table()
+        env.subscribe(EVENT_AGENT_STUCK, self._on_stuck, batched=True)
+
+    def _on_stuck(self, cells):
+        """Blocages du tick, reçus en un lot avant record"""
+        xs, ys = zip(*cells)
+        np.add.at(self.stuck, (np.array(ys), np.array(xs)), self._weight)
+
+    def record(self, agents):
+        """Compte la case de chaque agent pour le tick qui vient de s'écouler"""
+        xs = np.fromiter((a.x for a in agents), dtype=np.intp, count=len(agents))
+        ys = np.fromiter((a.y for a in agents), dtype=np.intp, count=len(agents))
+        np.add.at(self.visits, (ys, xs), self._weight)
+        self._version += 1
+        if self.decay < 1.0:
+            self._weight /= self.decay
+            if self._weight > 1e100:
+                # Ramène les compteurs à l'échelle réelle avant de déborder
+                self.visits /= self._weight
+                self.stuck /= self._weight
+                self._weight = 1.0
+
+    def values(self, kind):
+        """Compteurs (décroissance appliquée) d'un type : "visits" ou "stuck" """
+        return getattr(self, kind) / self._weight
+
+    def surface(self, kind):
+        """Surface d'un pixel par case, colorée en échelle logarithmique du maximum"""
+        import pygame  # Seulement pour l'affichage : les compteurs s'en passent
+
+        cached = self._surfaces.get(kind)
+        if cached is not None and cached[0] == self._version:
+            return cached[1]
+        values = getattr(self, kind)
+        top = values.max()
+        if top > 0:
+            levels = np.log1p(values * (Config.HEATMAP_SCALE / top)) / np.log1p(Config.HEATMAP_SCALE)
+            indices = (levels * 255).astype(np.intp)
+        else:
+            indices = np.zeros(values.shape, dtype=np.intp)
+        colors = self._colors[indices.T]
+        surface = pygame.Surface(values.shape[::-1], pygame.SRCALPHA, 32)
+        pygame.surfarray.pixels3d(surface)[...] = colors[..., :3]
+        pygame.surfarray.pixels_alpha(surface)[...] = colors[..., 3]
+        self._surfaces[kind] = (self._version, surface)
+        return surface
@@ -1,20 +1,46 @@
 """Gestion des entrées utilisateur"""
 import pygame
+from config import Config
+from heatmap import HEATMAP_KINDS
 import agent
 
 class InputHandler:
     """Gère les entrées utilisateur"""
     
     @staticmethod
-    def handle_events(events, game_state):
+    def handle_events(events, game_state, camera=None):
         """Traite les événements pygame"""
         for event in events:
             if event.type == pygame.QUIT:
                 return False
             elif event.type == pygame.KEYDOWN:
                 InputHandler._handle_keypress(event.key, game_state)
+                if camera is not None:
+                    InputHandler._handle_camera_key(event.key, camera)
+            elif camera is not None:
+                InputHandler._handle_camera_mouse(event, camera)
         return True
     
+    @staticmethod
+    def _handle_camera_mouse(event, camera):
+        """Molette : zoom sous le curseur ; glisser : déplacement de la vue"""
+        if event.type == pygame.MOUSEWHEEL:
+            px, py = pygame.mouse.get_pos()
+            if py < camera.view_height:
+                camera.zoom(Config.ZOOM_STEP ** event.y, px, py)
+        elif event.type == pygame.MOUSEMOTION and (event.buttons[0] or event.buttons[2]):
+            camera.pan(-event.rel[0], -event.rel[1])
+    
+    @staticmethod
+    def _handle_camera_key(key, camera):
+        """+ / - : zoom au centre de la vue ; F : toute la carte"""
+        if key in (pygame.K_PLUS, pygame.K_EQUALS, pygame.K_KP_PLUS):
+            camera.zoom(Config.ZOOM_STEP)
+        elif key in (pygame.K_MINUS, pygame.K_KP_MINUS):
+            camera.zoom(1 / Config.ZOOM_STEP)
+        elif key == pygame.K_f:
+            camera.fit()
+    
     @staticmethod
     def _handle_keypress(key, game_state):
         """Gère les touches clavier"""
@@ -22,6 +48,14 @@ class InputHandler:
             game_state['paused'] = not game_state['paused']
         elif key == pygame.K_r:
             game_state['reset'] = True
+        elif key == pygame.K_p:
+            game_state['performance'] = not game_state['performance']
+        elif key == pygame.K_m:
+            game_state['minimap'] = not game_state['minimap']
+        elif key == pygame.K_h:
+            # Passages, puis blocages, puis rien
+            kinds = (None,) + HEATMAP_KINDS
+            game_state['heatmap'] = kinds[(kinds.index(game_state['heatmap']) + 1) % len(kinds)]
         elif key == pygame.K_UP:
             agent.vision_range = min(agent.vision_range + 1, 20)
         elif key == pygame.K_DOWN:
@@ -0,0 +1,178 @@
+"""Tick en deux phases : calcul des intentions puis validation déterministe"""
+import copy
+import random
+from concurrent.futures import ThreadPoolExecutor
+from config import Config
+from agent import Agent
+from environment import EVENT_AGENT_MOVED
+
+
+class IntentView:
+    """
+    Vue de l'environnement pendant la phase d'intention.
+
+    Les lectures sont déléguées à l'environnement (inchangé pendant toute la
+    phase, il sert donc d'instantané), les écritures sont enregistrées comme
+    intentions au lieu d'être appliquées.
+    """
+
+    # L'empreinte de l'environnement réel est mise à jour à la validation
+    zobrist = None
+    # Les déplacements sont émis à la validation, avec l'agent réel (voir TwoPhaseTick._commit)
+    observed = frozenset()
+
+    def __init__(self, env):
+        self._env = env
+        self.intents = []
+
+    def __getattr__(self, name):
+        return getattr(self._env, name)
+
+    def harvest(self, x, y):
+        """Intention de récolter l'arbre en (x, y)"""
+        if self._env.grid[y][x] != Config.WOOD:
+            return False
+        self.intents.append(("harvest", x, y))
+        return True
+
+    def deposit_wood(self):
+        """Intention de déposer du bois au woodstock"""
+        self.intents.append(("deposit",))
+
+    def take_wood(self):
+        """Intention de prendre du bois au woodstock (False s'il est vide)"""
+        if self._env.woodstock["wood"] <= 0:
+            return False
+        self.intents.append(("take",))
+        return True
+
+    def add_bridge_section(self, row, col):
+        """Intention de construire, retourne le succès prévu d'après l'instantané"""
+        if self._env.grid[row][col] != Config.WATER:
+            return False
+        self.intents.append(("build", row, col))
+        progress = self._env.bridge_progress.get((row, col), 0) + 1
+        return progress >= Config.WOOD_NEEDED_PER_BRIDGE_CELL
+
+    def give_hint(self, agent, target, force_target=False):
+        """Intention de transmettre une direction à un agent"""
+        self.intents.append(("hint", agent, target, force_target))
+
+    def check_arrival(self, x, y):
+        """L'arrivée est vérifiée à la validation, sur la position retenue"""
+
+    def emit(self, event, data=None):
+        """
+        Les événements des primitives ci-dessus sont émis par l'environnement
+        réel à la validation ; ceux émis directement par l'agent sont rejoués
+        """
+        self.intents.append(("emit", event, data))
+
+
+class TwoPhaseTick:
+    """
+    Exécute un tick en deux phases :
+
+    1. chaque agent calcule ses intentions sur une copie de travail, à partir
+       de l'état figé du monde. Les workers (INTENT_WORKERS) sont des threads :
+       Agent.update est du Python pur qui garde le GIL, ils n'accélèrent donc
+       rien aujourd'hui (environ 20 % plus lent à 4 workers) et servent
+       seulement à vérifier que le résultat ne dépend pas de l'ordre de calcul ;
+    2. un résolveur valide les intentions dans un ordre déterministe (managers
+       d'abord, puis l'ordre de la liste) et les applique. Un agent dont une
+       intention échoue (case déjà prise, arbre déjà récolté, dernier bois
+       déjà pris) ne fait rien ce tick.
+
+    Chaque copie de travail reçoit son propre générateur aléatoire, dérivé
+    d'un tirage par tick et du rang de l'agent dans l'ordre de validation :
+    le résultat ne dépend ni de l'ordre de calcul, ni du nombre de workers,
+    ni des agents créés auparavant dans le processus.
+    """
+
+    def __init__(self, env, agents, workers=1):
+        self.env = env
+        self.agents = agents
+        self.ordered = sorted(agents, key=lambda agent: agent.role != "manager")
+        self._executor = ThreadPoolExecutor(max_workers=workers) if workers > 1 else None
+
+    def close(self):
+        """Arrête le pool de workers"""
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def _plan(self, index, agent, seed):
+        """Phase 1 : calcule les intentions d'un agent sans modifier le monde"""
+        shadow = copy.copy(agent)
+        # Aléa dérivé de la position dans l'ordre (et non de l'uid, qui dépend
+        # du nombre d'agents créés auparavant dans le processus)
+        shadow.rng = random.Random(seed ^ index)
+        view = IntentView(self.env)
+        shadow.update(view, self.agents)
+        return shadow, view.intents
+
+    def _is_valid(self, agent, shadow, intents, claimed):
+        """Vérifie que toutes les intentions d'un agent sont encore applicables"""
+        moved = (shadow.x, shadow.y) != (agent.x, agent.y)
+        if moved and Config.PREVENT_COLLISION and (shadow.x, shadow.y) in claimed:
+            return False
+        for intent in intents:
+            if intent[0] == "harvest" and self.env.grid[intent[2]][intent[1]] != Config.WOOD:
+                return False
+            if intent[0] == "take" and self.env.woodstock["wood"] <= 0:
+                return False
+        return True
+
+    def _commit(self, agent, shadow, intents, hints):
+        """Applique l'état de la copie de travail et ses intentions"""
+        old = (agent.x, agent.y, agent.inventory)
+        for name in Agent.__slots__:
+            if name != "rng":
+                setattr(agent, name, getattr(shadow, name))
+        if self.env.zobrist is not None:
+            self.env.zobrist.agent_changed(agent, *old)
+        if (agent.x, agent.y) != old[:2] and EVENT_AGENT_MOVED in self.env.observed:
+            self.env.emit(EVENT_AGENT_MOVED, (agent, old[0], old[1]))
+
+        for intent in intents:
+            kind = intent[0]
+            if kind == "harvest":
+                self.env.harvest(intent[1], intent[2])
+            elif kind == "deposit":
+                self.env.deposit_wood()
+            elif kind == "take":
+                self.env.take_wood()
+            elif kind == "build":
+                self.env.add_bridge_section(intent[1], intent[2])
+            elif kind == "hint":
+                hints.append(intent[1:])
+            elif kind == "emit":
+                self.env.emit(intent[1], intent[2])
+
+        self.env.check_arrival(agent.x, agent.y)
+
+    def run_tick(self):
+        """Exécute un tick complet (intentions puis validation)"""
+        seed = random.getrandbits(64)
+
+        # Phase 1 : intentions (le monde n'est pas modifié)
+        if self._executor is not None:
+            plans = list(self._executor.map(lambda item: self._plan(*item, seed), enumerate(self.ordered)))
+        else:
+            plans = [self._plan(index, agent, seed) for index, agent in enumerate(self.ordered)]
+
+        # Phase 2 : validation dans l'ordre déterministe
+        # Les cases occupées au début du tick ne peuvent pas être visées par
+        # un déplacement (les agents le vérifient sur l'instantané), seules les
+        # destinations déjà retenues ce tick peuvent donc entrer en conflit.
+        claimed = set()
+        hints = []
+        for agent, (shadow, intents) in zip(self.ordered, plans):
+            if not self._is_valid(agent, shadow, intents, claimed):
+                continue
+            self._commit(agent, shadow, intents, hints)
+            claimed.add((agent.x, agent.y))
+
+        # Les directions transmises sont visibles au tick suivant
+        for other, target, force_target in hints:
+            self.env.give_hint(other, target, force_target)
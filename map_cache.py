@@ -0,0 +1,79 @@
+"""Cache sur disque des précalculs d'une carte"""
+import hashlib
+import os
+import shutil
+import numpy as np
+from config import Config
+
+# À incrémenter quand le format ou le calcul d'un artefact change
+CACHE_FORMAT = 1
+
+
+def terrain_key(grid, woodstock_pos, arrival_pos):
+    """
+    Empreinte du terrain : eau, murs, woodstock et arrivée. Les arbres
+    (placés aléatoirement à chaque chargement) n'en font pas partie.
+    """
+    codes = bytearray()
+    for row in grid:
+        for value in row:
+            codes.append(1 if value == Config.WATER else 2 if value == Config.WALL else 0)
+    digest = hashlib.sha256()
+    digest.update(repr((CACHE_FORMAT, len(grid), len(grid[0]) if grid else 0,
+                        woodstock_pos, arrival_pos)).encode())
+    digest.update(bytes(codes))
+    return digest.hexdigest()
+
+
+class MapCache:
+    """
+    Artefacts dérivés d'une carte (étiquettes des rivières, connexité,
+    graphe des clusters) enregistrés à côté du fichier de carte, dans
+    <carte>.cache/<empreinte du terrain>/.
+
+    Chaque artefact est un fichier .npy : tant que le terrain ne change pas,
+    le chargement évite les calculs et ne coûte que la lecture du fichier et
+    sa conversion vers les structures Python des consommateurs. Les
+    artefacts décrivent le terrain au chargement (sans pont).
+    """
+
+    def __init__(self, map_path, grid, woodstock_pos, arrival_pos):
+        self.key = terrain_key(grid, woodstock_pos, arrival_pos)
+        self.root = map_path + ".cache"
+        self.directory = os.path.join(self.root, self.key[:16])
+        self._pruned = False
+
+    def _path(self, name):
+        return os.path.join(self.directory, name + ".npy")
+
+    def load(self, name):
+        """Artefact enregistré (tableau NumPy), ou None"""
+        path = self._path(name)
+        if not os.path.exists(path):
+            return None
+        try:
+            return np.load(path)
+        except (OSError, ValueError):
+            return None
+
+    def save(self, name, array):
+        """Enregistre un artefact (écriture atomique)"""
+        try:
+            if not self._pruned:
+                self._prune()
+            os.makedirs(self.directory, exist_ok=True)
+            tmp = self._path(name) + ".tmp"
+            with open(tmp, "wb") as f:
+                np.save(f, np.asarray(array))
+            os.replace(tmp, self._path(name))
+        except OSError as e:
+            print(f"Avertissement: cache de carte non écrit ({e})")
+
+    def _prune(self):
+        """Supprime les artefacts d'une version précédente du terrain"""
+        self._pruned = True
+        if not os.path.isdir(self.root):
+            return
+        for entry in os.listdir(self.root):
+            if entry != os.path.basename(self.directory):
+                shutil.rmtree(os.path.join(self.root, entry), ignore_errors=True)
@@ -0,0 +1,238 @@
+"""Mesures de latence (ticks de simulation, images affichées) et de mémoire"""
+import argparse
+import functools
+import sys
+import time
+import types
+from collections import deque
+from config import Config
+from environment import EVENTS
+
+# Résolution : 2^SUB_BUCKET_BITS valeurs exactes, puis 2^(SUB_BUCKET_BITS - 1)
+# seaux par puissance de 2 (erreur relative < 1/64 avec 7 bits)
+SUB_BUCKET_BITS = 7
+SUB_BUCKET_COUNT = 1 << SUB_BUCKET_BITS
+SUB_BUCKET_HALF = SUB_BUCKET_COUNT // 2
+
+
+class LatencyHistogram:
+    """
+    Histogramme de durées à précision relative constante (façon HDR).
+
+    Les durées sont comptées en microsecondes dans des seaux log-linéaires :
+    l'enregistrement est en temps constant et la mémoire ne dépend que de
+    la plus grande valeur vue, pas du nombre d'échantillons.
+    """
+
+    def __init__(self, rate_window=1.0):
+        self.rate_window = rate_window
+        self.reset()
+
+    def reset(self):
+        """Oublie tous les échantillons"""
+        self.counts = []
+        self.count = 0
+        self.total = 0
+        self.max = 0
+        self.last = 0
+        self._recent = deque()  # Instants des derniers enregistrements (pour rate)
+
+    @staticmethod
+    def _index(value):
+        """Seau d'une valeur en microsecondes"""
+        if value < SUB_BUCKET_COUNT:
+            return value
+        shift = value.bit_length() - SUB_BUCKET_BITS
+        return SUB_BUCKET_COUNT + (shift - 1) * SUB_BUCKET_HALF + (value >> shift) - SUB_BUCKET_HALF
+
+    @staticmethod
+    def _upper(index):
+        """Plus grande valeur (microsecondes) comptée dans un seau"""
+        if index < SUB_BUCKET_COUNT:
+            return index
+        shift = (index - SUB_BUCKET_COUNT) // SUB_BUCKET_HALF + 1
+        mantissa = (index - SUB_BUCKET_COUNT) % SUB_BUCKET_HALF + SUB_BUCKET_HALF
+        return ((mantissa + 1) << shift) - 1
+
+    def record(self, seconds):
+        """Enregistre une durée (en secondes)"""
+        value = int(seconds * 1e6)
+        index = self._index(value)
+        if index >= len(self.counts):
+            self.counts.extend([0] * (index + 1 - len(self.counts)))
+        self.counts[index] += 1
+        self.count += 1
+        self.total += value
+        self.last = value
+        if value > self.max:
+            self.max = value
+
+        now = time.perf_counter()
+        self._recent.append(now)
+        while self._recent[0] < now - self.rate_window:
+            self._recent.popleft()
+
+    def percentile(self, p):
+        """Durée (secondes) sous laquelle tombent p % des échantillons"""
+        if self.count == 0:
+            return 0.0
+        threshold = max(1, int(self.count * p / 100.0 + 0.5))
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= threshold:
+                return min(self._upper(index), self.max) / 1e6
+        return self.max / 1e6
+
+    def rate(self):
+        """Enregistrements par seconde sur la dernière fenêtre"""
+        if len(self._recent) < 2:
+            return 0.0
+        elapsed = self._recent[-1] - self._recent[0]
+        return (len(self._recent) - 1) / elapsed if elapsed > 0 else 0.0
+
+    def summary(self):
+        """p50/p95/p99/max et moyenne en millisecondes"""
+        return {
+            "count": self.count,
+            "mean": self.total / self.count / 1e3 if self.count else 0.0,
+            "p50": self.percentile(50) * 1e3,
+            "p95": self.percentile(95) * 1e3,
+            "p99": self.percentile(99) * 1e3,
+            "max": self.max / 1e3,
+        }
+
+    def format(self, label):
+        """Résumé sur une ligne"""
+        s = self.summary()
+        return (f"{label}: n={s['count']} p50={s['p50']:.2f} p95={s['p95']:.2f} "
+                f"p99={s['p99']:.2f} max={s['max']:.2f} ms")
+
+
+# Objets partagés par nature (jamais comptés) et petits entiers mis en cache par CPython
+_SHARED_TYPES = (type, types.ModuleType, types.FunctionType, types.BuiltinFunctionType, types.MethodType)
+
+
+class EventCounter:
+    """
+    Nombre d'émissions de chaque type d'événement depuis la création.
+    Abonné par lots : un appel par type et par tick, et aucun coût pour les
+    types non demandés.
+    """
+
+    def __init__(self, env, events=EVENTS):
+        self.env = env
+        self.totals = {}
+        self.start_tick = env.tick
+        for event in events:
+            self.totals[event] = 0
+            env.subscribe(event, functools.partial(self._on_batch, event), batched=True)
+
+    def _on_batch(self, event, batch):
+        self.totals[event] += len(batch)
+
+    def per_tick(self):
+        """Émissions moyennes par tick de chaque type depuis la création"""
+        ticks = max(1, self.env.tick - self.start_tick)
+        return {event: total / ticks for event, total in self.totals.items()}
+
+    def format(self):
+        """Compteurs lisibles (types émis au moins une fois)"""
+        rates = self.per_tick()
+        lines = ["Événements:"]
+        for event, total in self.totals.items():
+            if total:
+                lines.append(f"  {event}: {total} ({rates[event]:.2f}/tick)")
+        return "\n".join(lines)
+
+
+def deep_size(obj, seen):
+    """Taille en octets d'un objet et de ce qu'il référence (sans recompter seen)"""
+    if id(obj) in seen or isinstance(obj, _SHARED_TYPES) or obj is None or isinstance(obj, bool):
+        return 0
+    if isinstance(obj, int) and -5 <= obj <= 256:
+        return 0
+    seen.add(id(obj))
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(deep_size(key, seen) + deep_size(value, seen) for key, value in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset, deque)):
+        size += sum(deep_size(item, seen) for item in obj)
+    elif not isinstance(obj, (int, float, str, bytes)):
+        if hasattr(obj, "__dict__"):
+            size += deep_size(vars(obj), seen)
+        for name in getattr(type(obj), "__slots__", ()):
+            if hasattr(obj, name):
+                size += deep_size(getattr(obj, name), seen)
+    return size
+
+
+def memory_report(simulation):
+    """Octets par agent et par case d'une simulation (composants optionnels compris)"""
+    env = simulation.env
+    seen = {id(env), id(simulation.agents)}
+    agent_bytes = sum(deep_size(agent, seen) for agent in simulation.agents)
+
+    components = {
+        "grid": env.grid,
+        "water_labels": env.water_labels,
+        "rivers": env.rivers,
+        "bridges": (env.bridge_progress, env.bridge_cells),
+        "connectivity": env.connectivity,
+        "planner": env.planner,
+        "reservations": env.reservations,
+        "bitboards": env.bitboards,
+        "wood_density": env.wood_density,
+        "heatmap": env.heatmap,
+    }
+    # Les agents sont déjà comptés (et référencés par certains composants)
+    seen.update(id(agent) for agent in simulation.agents)
+    sizes = {name: deep_size(value, seen) for name, value in components.items()}
+    cells = env.rows * env.cols
+    agents = len(simulation.agents)
+    return {
+        "agents": agents,
+        "bytes_per_agent": agent_bytes / agents if agents else 0.0,
+        "cells": cells,
+        "bytes_per_cell": sum(sizes.values()) / cells if cells else 0.0,
+        "components": sizes,
+    }
+
+
+def format_memory_report(report):
+    """Rapport mémoire lisible"""
+    lines = [
+        f"Agents: {report['agents']} x {report['bytes_per_agent']:.0f} octets",
+        f"Cases: {report['cells']} x {report['bytes_per_cell']:.1f} octets",
+    ]
+    for name, size in report["components"].items():
+        if size:
+            lines.append(f"  {name}: {size} octets")
+    return "\n".join(lines)
+
+
+def main():
+    """Rapport mémoire pour une population donnée (répartie comme la configuration)"""
+    from simulation import Simulation  # simulation importe ce module
+
+    parser = argparse.ArgumentParser(description="Rapport mémoire d'une simulation")
+    parser.add_argument("--agents", type=int, default=None, help="Population totale")
+    parser.add_argument("--map", default=None, help="Fichier de carte")
+    parser.add_argument("--ticks", type=int, default=100, help="Ticks simulés avant la mesure")
+    args = parser.parse_args()
+
+    if args.agents is not None:
+        total = Config.NUM_GATHERERS + Config.NUM_BUILDERS + Config.NUM_MANAGERS
+        Config.NUM_BUILDERS = args.agents * Config.NUM_BUILDERS // total
+        Config.NUM_MANAGERS = args.agents * Config.NUM_MANAGERS // total
+        Config.NUM_GATHERERS = args.agents - Config.NUM_BUILDERS - Config.NUM_MANAGERS
+    simulation = Simulation(args.map)
+    events = EventCounter(simulation.env)
+    for _ in range(args.ticks):
+        simulation.step()
+    print(format_memory_report(memory_report(simulation)))
+    print(events.format())
+
+
+if __name__ == "__main__":
+    main()
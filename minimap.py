@@ -0,0 +1,87 @@
+"""Minimap de toute la carte (terrain, ponts en construction, densité d'agents)"""
+import math
+import numpy as np
+import pygame
+from config import Config
+from environment import EVENT_CELL_CHANGED
+
+
+class Minimap:
+    """
+    Vue d'ensemble où chaque pixel résume un bloc de block x block cases
+    (couleur moyenne du terrain). Les sommes de couleurs par bloc sont
+    calculées une fois depuis la grille puis corrigées case par case sur
+    EVENT_CELL_CHANGED ; les agents sont dessinés comme une couche de
+    densité (un histogramme par bloc), pas individuellement.
+    """
+
+    def __init__(self, env, width, height):
+        self.env = env
+        self.block = max(1, math.ceil(env.cols / width), math.ceil(env.rows / height))
+        b = self.block
+        self.map_width = math.ceil(env.cols / b)
+        self.map_height = math.ceil(env.rows / b)
+        # Pixels affichés par pixel de minimap (la minimap garde les proportions de la carte)
+        self.scale = min(width / self.map_width, height / self.map_height)
+        self.size = (max(1, int(self.map_width * self.scale)), max(1, int(self.map_height * self.scale)))
+
+        terrain = np.zeros((self.map_height * b, self.map_width * b, 3), dtype=np.int32)
+        terrain[:env.rows, :env.cols] = np.array(env.grid, dtype=np.int32).reshape(env.rows, env.cols, 3)
+        cells = np.zeros((self.map_height * b, self.map_width * b), dtype=np.int32)
+        cells[:env.rows, :env.cols] = 1
+        self.sums = terrain.reshape(self.map_height, b, self.map_width, b, 3).sum(axis=(1, 3))
+        self.counts = cells.reshape(self.map_height, b, self.map_width, b).sum(axis=(1, 3))
+
+        self.surface = pygame.Surface((self.map_width, self.map_height), 0, 32)
+        pygame.surfarray.blit_array(self.surface, (self.sums // self.counts[..., None]).transpose(1, 0, 2))
+        self.density = pygame.Surface((self.map_width, self.map_height), pygame.SRCALPHA, 32)
+        self.density.fill(Config.MINIMAP_AGENT_COLOR + (0,))
+        env.subscribe(EVENT_CELL_CHANGED, self._on_cell_changed)
+
+    def _on_cell_changed(self, data):
+        """Recalcule la couleur du seul bloc contenant la case modifiée"""
+        x, y, old, new = data
+        bx, by = x // self.block, y // self.block
+        total = self.sums[by, bx]
+        total += np.subtract(new, old)
+        count = self.counts[by, bx]
+        self.surface.set_at((bx, by), [int(v) // count for v in total])
+
+    def _update_density(self, agents):
+        """Opacité de chaque bloc proportionnelle au nombre d'agents qu'il contient"""
+        xs = np.fromiter((a.x for a in agents), dtype=np.intp, count=len(agents))
+        ys = np.fromiter((a.y for a in agents), dtype=np.intp, count=len(agents))
+        counts = np.bincount((ys // self.block) * self.map_width + xs // self.block,
+                             minlength=self.map_width * self.map_height)
+        alpha = np.minimum(counts * Config.MINIMAP_AGENT_ALPHA, 255)
+        pixels = pygame.surfarray.pixels_alpha(self.density)
+        pixels[...] = alpha.reshape(self.map_height, self.map_width).T
+        del pixels  # Déverrouille la surface
+
+    def _to_minimap(self, x, y):
+        """Pixel (relatif) de la minimap affichée pour une position sur la carte"""
+        return int(x / self.block * self.scale), int(y / self.block * self.scale)
+
+    def draw(self, screen, position, agents, camera=None):
+        """Dessine la minimap avec son coin haut gauche en position"""
+        left, top = position
+        screen.blit(pygame.transform.scale(self.surface, self.size), position)
+
+        # Sections de pont en cours (les sections terminées sont dans le terrain)
+        needed = Config.WOOD_NEEDED_PER_BRIDGE_CELL
+        mark = max(1, int(self.scale))
+        for (row, col), progress in self.env.bridge_progress.items():
+            if progress < needed:
+                px, py = self._to_minimap(col, row)
+                pygame.draw.rect(screen, Config.BRIDGE, (left + px, top + py, mark, mark))
+
+        self._update_density(agents)
+        screen.blit(pygame.transform.scale(self.density, self.size), position)
+
+        # Zone affichée par la caméra
+        if camera is not None:
+            c0, r0, c1, r1 = camera.visible_range()
+            x0, y0 = self._to_minimap(c0, r0)
+            x1, y1 = self._to_minimap(c1, r1)
+            pygame.draw.rect(screen, (255, 255, 255), (left + x0, top + y0, max(1, x1 - x0), max(1, y1 - y0)), 1)
+        pygame.draw.rect(screen, (0, 0, 0), (left - 1, top - 1, self.size[0] + 2, self.size[1] + 2), 1)
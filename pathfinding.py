@@ -0,0 +1,387 @@
+"""Recherche de chemins sur la grille"""
+import heapq
+import threading
+from collections import deque
+import numpy as np
+from config import Config
+from environment import EVENT_CELL_CHANGED
+
+# Déplacements 4-connexes (l'attente sur place est gérée à part)
+MOVES = ((1, 0), (-1, 0), (0, 1), (0, -1))
+
+
+def manhattan(a, b):
+    """Distance de Manhattan entre deux cases (x, y)"""
+    return abs(a[0] - b[0]) + abs(a[1] - b[1])
+
+
+def goal_reached(pos, goal, goal_walkable):
+    """Vrai si pos atteint le but (ou le touche si le but n'est pas traversable)"""
+    if goal_walkable:
+        return pos == goal
+    return abs(pos[0] - goal[0]) <= 1 and abs(pos[1] - goal[1]) <= 1
+
+
+def space_time_astar(start, goal, t0, window, walkable, move_free):
+    """
+    A* dans l'espace-temps (x, y, t) avec une fenêtre limitée (WHCA*).
+
+    Args:
+        start: case de départ (x, y) au tick t0
+        goal: case visée (si elle n'est pas traversable, la toucher suffit)
+        window: nombre maximal de ticks planifiés
+        walkable: walkable(x, y) -> bool
+        move_free: move_free(start, end, t) -> bool, vrai si le déplacement
+            (ou l'attente si start == end) entre t et t + 1 est libre
+
+    Retourne: la liste des positions aux ticks t0 + 1, t0 + 2, ... (vide si
+    le but est déjà atteint), ou None si aucun chemin ne rapproche du but.
+    """
+    goal_walkable = walkable(*goal)
+    if goal_reached(start, goal, goal_walkable):
+        return []
+
+    start_h = manhattan(start, goal)
+    open_heap = [(start_h, start_h, 0, start)]
+    came_from = {(start, 0): None}
+    best = None  # Nœud atteint le plus proche du but (le plus tôt possible) : (h, dt, pos)
+
+    while open_heap:
+        _, h, dt, pos = heapq.heappop(open_heap)
+        if goal_reached(pos, goal, goal_walkable):
+            return _rebuild(came_from, pos, dt)
+        if best is None or (h, dt) < best[:2]:
+            best = (h, dt, pos)
+        if dt == window:
+            continue
+
+        t = t0 + dt
+        for dx, dy in MOVES + ((0, 0),):
+            nxt = (pos[0] + dx, pos[1] + dy)
+            key = (nxt, dt + 1)
+            if key in came_from:
+                continue
+            if nxt != pos and not walkable(*nxt):
+                continue
+            if not move_free(pos, nxt, t):
+                continue
+            came_from[key] = (pos, dt)
+            nh = manhattan(nxt, goal)
+            heapq.heappush(open_heap, (dt + 1 + nh, nh, dt + 1, nxt))
+
+    # Chemin partiel : seulement s'il rapproche réellement du but
+    if best is None or best[0] >= start_h:
+        return None
+    return _rebuild(came_from, best[2], best[1])
+
+
+def _rebuild(came_from, pos, dt):
+    """Reconstruit la suite des positions depuis le nœud (pos, dt)"""
+    path = []
+    node = (pos, dt)
+    while came_from[node] is not None:
+        path.append(node[0])
+        node = came_from[node]
+    path.reverse()
+    return path
+
+
+def is_walkable_value(value):
+    """Vrai si un type de terrain est traversable (ni eau, ni mur)"""
+    return value != Config.WATER and value != Config.WALL
+
+
+class HierarchicalPlanner:
+    """
+    Planificateur hiérarchique (HPA*).
+
+    La grille est découpée en clusters carrés. Les passages entre clusters
+    voisins donnent des nœuds d'entrée ; les distances entre entrées d'un
+    même cluster sont précalculées, ce qui forme un graphe abstrait. Une
+    requête cherche un chemin dans ce graphe (liste de points de passage),
+    chaque segment n'est raffiné en cases que lorsqu'on l'atteint.
+
+    Quand une case change de traversabilité (pont construit), seuls son
+    cluster et ses voisins sont recalculés, à la requête suivante.
+    """
+
+    def __init__(self, env, cluster_size):
+        self.env = env
+        self.size = cluster_size
+        self.rows = env.rows
+        self.cols = env.cols
+        self.cluster_rows = (self.rows + cluster_size - 1) // cluster_size
+        self.cluster_cols = (self.cols + cluster_size - 1) // cluster_size
+        self.version = 0  # Incrémenté à chaque changement de traversabilité
+
+        self._borders = {}  # (cluster_a, cluster_b) -> [(case côté a, case côté b)]
+        self._inter = {}  # case d'entrée -> entrées voisines dans un autre cluster
+        self._intra = {}  # case d'entrée -> {entrée du même cluster: distance}
+        self._entrances = {}  # cluster -> entrées
+        self._dirty = {(cx, cy) for cx in range(self.cluster_cols) for cy in range(self.cluster_rows)}
+        self._lock = threading.Lock()
+
+        env.subscribe(EVENT_CELL_CHANGED, self._on_cell_changed)
+        # Le cache de la carte décrit le terrain initial (aucun pont construit)
+        if env.map_cache is not None and not env.bridge_cells:
+            name = f"clusters_{cluster_size}_"
+            borders = env.map_cache.load(name + "borders")
+            intra = env.map_cache.load(name + "intra")
+            if borders is not None and intra is not None:
+                self.import_graph(borders, intra)
+            else:
+                self._refresh()
+                borders, intra = self.export_graph()
+                env.map_cache.save(name + "borders", borders)
+                env.map_cache.save(name + "intra", intra)
+        else:
+            self._refresh()
+
+    # --- Maintenance du graphe abstrait ---
+
+    def _on_cell_changed(self, data):
+        """Marque le cluster d'une case dont la traversabilité a changé"""
+        x, y, old, new = data
+        if is_walkable_value(old) != is_walkable_value(new):
+            self._dirty.add(self.cluster_of(x, y))
+            self.version += 1
+
+    def cluster_of(self, x, y):
+        """Cluster (cx, cy) contenant la case (x, y)"""
+        return (x // self.size, y // self.size)
+
+    def _bounds(self, cluster):
+        """Bornes (x0, y0, x1, y1) exclusives d'un cluster"""
+        cx, cy = cluster
+        x0, y0 = cx * self.size, cy * self.size
+        return x0, y0, min(x0 + self.size, self.cols), min(y0 + self.size, self.rows)
+
+    def _walkable(self, x, y):
+        return 0 <= x < self.cols and 0 <= y < self.rows and is_walkable_value(self.env.grid[y][x])
+
+    def _refresh(self):
+        """Recalcule les clusters modifiés depuis la dernière requête"""
+        if not self._dirty:
+            return
+        with self._lock:
+            dirty, self._dirty = self._dirty, set()
+            if not dirty:
+                return
+            borders = set()
+            touched = set(dirty)
+            for cx, cy in dirty:
+                for other in ((cx + 1, cy), (cx - 1, cy), (cx, cy + 1), (cx, cy - 1)):
+                    if 0 <= other[0] < self.cluster_cols and 0 <= other[1] < self.cluster_rows:
+                        borders.add(min((cx, cy), other) + max((cx, cy), other))
+                        touched.add(other)
+            for border in borders:
+                self._build_border(border[:2], border[2:])
+            for cluster in touched:
+                self._build_intra(cluster)
+
+    def _build_border(self, a, b):
+        """Recalcule les passages entre deux clusters voisins (a avant b)"""
+        for cell_a, cell_b in self._borders.get((a, b), ()):
+            self._inter[cell_a].discard(cell_b)
+            self._inter[cell_b].discard(cell_a)
+
+        ax0, ay0, ax1, ay1 = self._bounds(a)
+        if a[0] != b[0]:
+            # Frontière verticale : colonne ax1 - 1 (côté a) / ax1 (côté b)
+            pairs = [((ax1 - 1, y), (ax1, y)) for y in range(ay0, ay1)]
+        else:
+            # Frontière horizontale : ligne ay1 - 1 (côté a) / ay1 (côté b)
+            pairs = [((x, ay1 - 1), (x, ay1)) for x in range(ax0, ax1)]
+
+        # Segments continus de passages ouverts
+        transitions = []
+        run = []
+        for pair in pairs + [None]:
+            if pair is not None and self._walkable(*pair[0]) and self._walkable(*pair[1]):
+                run.append(pair)
+                continue
+            if run:
+                # Un passage au milieu des segments courts, deux aux extrémités des longs
+                if len(run) < 6:
+                    transitions.append(run[len(run) // 2])
+                else:
+                    transitions.extend((run[0], run[-1]))
+                run = []
+
+        self._borders[(a, b)] = transitions
+        for cell_a, cell_b in transitions:
+            self._inter.setdefault(cell_a, set()).add(cell_b)
+            self._inter.setdefault(cell_b, set()).add(cell_a)
+
+    def _build_intra(self, cluster):
+        """Recalcule les entrées d'un cluster et leurs distances internes"""
+        for cell in self._entrances.get(cluster, ()):
+            self._intra.pop(cell, None)
+
+        cx, cy = cluster
+        entrances = set()
+        for other in ((cx + 1, cy), (cx, cy + 1)):
+            entrances.update(cell_a for cell_a, _ in self._borders.get((cluster, other), ()))
+        for other in ((cx - 1, cy), (cx, cy - 1)):
+            entrances.update(cell_b for _, cell_b in self._borders.get((other, cluster), ()))
+        self._entrances[cluster] = entrances
+
+        bounds = self._bounds(cluster)
+        for cell in entrances:
+            distances = self._bfs(cell, bounds)
+            self._intra[cell] = {other: distances[other] for other in entrances
+                                 if other != cell and other in distances}
+
+    def export_graph(self):
+        """
+        Graphe abstrait sous forme de tableaux : passages (ax, ay, bx, by,
+        xa, ya, xb, yb) et distances internes (x1, y1, x2, y2, distance).
+        """
+        self._refresh()
+        borders = [a + b + cell_a + cell_b
+                   for (a, b), transitions in self._borders.items()
+                   for cell_a, cell_b in transitions]
+        intra = [cell + other + (distance,)
+                 for cell, distances in self._intra.items()
+                 for other, distance in distances.items()]
+        return (np.array(borders, dtype=np.int32).reshape(-1, 8),
+                np.array(intra, dtype=np.int32).reshape(-1, 5))
+
+    def import_graph(self, borders, intra):
+        """Remplace le graphe abstrait par celui exporté par export_graph"""
+        with self._lock:
+            self._borders = {}
+            self._inter = {}
+            for ax, ay, bx, by, xa, ya, xb, yb in borders.tolist():
+                cell_a, cell_b = (xa, ya), (xb, yb)
+                self._borders.setdefault(((ax, ay), (bx, by)), []).append((cell_a, cell_b))
+                self._inter.setdefault(cell_a, set()).add(cell_b)
+                self._inter.setdefault(cell_b, set()).add(cell_a)
+            # Entrées des clusters : extrémités des passages (comme _build_intra)
+            self._entrances = {(cx, cy): set() for cx in range(self.cluster_cols)
+                               for cy in range(self.cluster_rows)}
+            self._intra = {}
+            for cell in self._inter:
+                self._entrances[self.cluster_of(*cell)].add(cell)
+                self._intra[cell] = {}
+            for x1, y1, x2, y2, distance in intra.tolist():
+                self._intra[(x1, y1)][(x2, y2)] = distance
+            self._dirty = set()
+
+    # --- Recherche ---
+
+    def _bfs(self, start, bounds, goal=None):
+        """Parcours en largeur limité à un rectangle ; retourne {case: distance} (ou le chemin vers goal)"""
+        x0, y0, x1, y1 = bounds
+        parents = {start: None}
+        distances = {start: 0}
+        queue = deque([start])
+        while queue:
+            pos = queue.popleft()
+            if pos == goal:
+                path = []
+                while pos != start:
+                    path.append(pos)
+                    pos = parents[pos]
+                path.reverse()
+                return path
+            for dx, dy in MOVES:
+                nxt = (pos[0] + dx, pos[1] + dy)
+                if nxt in distances or not (x0 <= nxt[0] < x1 and y0 <= nxt[1] < y1):
+                    continue
+                if not self._walkable(*nxt):
+                    continue
+                parents[nxt] = pos
+                distances[nxt] = distances[pos] + 1
+                queue.append(nxt)
+        return None if goal is not None else distances
+
+    def find_path(self, start, goal):
+        """
+        Chemin abstrait de start vers goal (si goal n'est pas traversable,
+        vers une case traversable qui le touche).
+
+        Retourne: la liste des points de passage (le dernier est le but
+        atteint), [] si start est déjà le but, ou None si aucun chemin.
+        """
+        self._refresh()
+        if self._walkable(*goal):
+            return self._find_abstract_path(start, goal)
+
+        # But non traversable (eau) : viser une case voisine, la plus proche d'abord
+        if abs(start[0] - goal[0]) <= 1 and abs(start[1] - goal[1]) <= 1:
+            return []
+        neighbours = [(goal[0] + dx, goal[1] + dy) for dx in (-1, 0, 1) for dy in (-1, 0, 1)]
+        neighbours = [cell for cell in neighbours if cell != goal and self._walkable(*cell)]
+        neighbours.sort(key=lambda cell: manhattan(start, cell))
+        for cell in neighbours:
+            path = self._find_abstract_path(start, cell)
+            if path is not None:
+                return path
+        return None
+
+    def _find_abstract_path(self, start, goal):
+        """A* dans le graphe abstrait, complété par le départ et le but"""
+        if start == goal:
+            return []
+        start_cluster = self.cluster_of(*start)
+        goal_cluster = self.cluster_of(*goal)
+
+        # Même cluster : un chemin interne suffit
+        if start_cluster == goal_cluster and self._bfs(start, self._bounds(start_cluster), goal) is not None:
+            return [goal]
+
+        # Relier départ et but aux entrées de leur cluster
+        start_dist = self._bfs(start, self._bounds(start_cluster))
+        start_edges = {cell: start_dist[cell] for cell in self._entrances[start_cluster] if cell in start_dist}
+        goal_dist = self._bfs(goal, self._bounds(goal_cluster))
+        goal_edges = {cell: goal_dist[cell] for cell in self._entrances[goal_cluster] if cell in goal_dist}
+        if not start_edges or not goal_edges:
+            return None
+
+        costs = {start: 0}
+        parents = {start: None}
+        open_heap = [(manhattan(start, goal), 0, start)]
+        while open_heap:
+            _, cost, node = heapq.heappop(open_heap)
+            if node == goal:
+                path = []
+                while node != start:
+                    path.append(node)
+                    node = parents[node]
+                path.reverse()
+                return path
+            if cost > costs[node]:
+                continue
+            if node == start:
+                neighbours = list(start_edges.items())
+                # Départ sur une entrée : ses passages vers les clusters voisins
+                neighbours.extend((cell, 1) for cell in self._inter.get(start, ()))
+                if start in goal_edges:
+                    neighbours.append((goal, goal_edges[start]))
+            else:
+                neighbours = list(self._intra.get(node, {}).items())
+                neighbours.extend((cell, 1) for cell in self._inter.get(node, ()))
+                if node in goal_edges:
+                    neighbours.append((goal, goal_edges[node]))
+            for nxt, step in neighbours:
+                new_cost = cost + step
+                if new_cost < costs.get(nxt, float('inf')):
+                    costs[nxt] = new_cost
+                    parents[nxt] = node
+                    heapq.heappush(open_heap, (new_cost + manhattan(nxt, goal), new_cost, nxt))
+        return None
+
+    def refine(self, start, waypoint):
+        """Chemin en cases de start vers le point de passage suivant (sans start)"""
+        if start == waypoint:
+            return []
+        # Les segments abstraits restent dans un cluster ou franchissent une frontière
+        ax0, ay0, ax1, ay1 = self._bounds(self.cluster_of(*start))
+        bx0, by0, bx1, by1 = self._bounds(self.cluster_of(*waypoint))
+        bounds = (min(ax0, bx0), min(ay0, by0), max(ax1, bx1), max(ay1, by1))
+        path = self._bfs(start, bounds, waypoint)
+        if path is None:
+            # Agent écarté de sa route : recherche sur toute la grille
+            path = self._bfs(start, (0, 0, self.cols, self.rows), waypoint)
+        return path
@@ -0,0 +1,145 @@
+"""Export d'une simulation en images ou en vidéo, sans fenêtre"""
+import argparse
+import os
+import queue
+import random
+import shutil
+import subprocess
+import threading
+import pygame
+from game import Game
+
+# Extensions envoyées à ffmpeg (les autres sorties sont des dossiers d'images PNG)
+VIDEO_EXTENSIONS = (".mp4", ".mkv", ".webm", ".avi", ".gif")
+
+
+class FrameRecorder:
+    """
+    Encodeur d'images en arrière-plan. add() copie l'image (redimensionnée
+    d'un facteur scale) dans une file bornée ; un thread l'écrit en PNG
+    numérotés dans un dossier ou l'envoie à ffmpeg pour une vidéo. Quand la
+    file est pleine, add() attend que l'encodeur rattrape son retard.
+    """
+
+    def __init__(self, output, fps=30, scale=1.0, queue_size=64):
+        self.output = output
+        self.fps = fps
+        self.scale = scale
+        self.frames = 0
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._size = None
+        self._ffmpeg = None
+        self._error = None
+        if not output.lower().endswith(VIDEO_EXTENSIONS):
+            os.makedirs(output, exist_ok=True)
+        elif shutil.which("ffmpeg") is None:
+            raise RuntimeError("ffmpeg est nécessaire pour exporter une vidéo (ou donner un dossier)")
+        self._worker = threading.Thread(target=self._run, daemon=True)
+        self._worker.start()
+
+    def add(self, surface):
+        """Ajoute une image (copiée : la surface peut être redessinée aussitôt)"""
+        if self._error is not None:
+            raise self._error
+        if self.scale != 1.0:
+            width, height = surface.get_size()
+            surface = pygame.transform.smoothscale(
+                surface, (max(1, int(width * self.scale)), max(1, int(height * self.scale))))
+        if self._size is None:
+            # ffmpeg exige des dimensions paires pour la plupart des codecs
+            width, height = surface.get_size()
+            self._size = (width // 2 * 2 or width, height // 2 * 2 or height)
+        if surface.get_size() != self._size:
+            surface = surface.subsurface((0, 0) + self._size)
+        self._queue.put(pygame.image.tobytes(surface, "RGB"))
+        self.frames += 1
+
+    def _start_ffmpeg(self):
+        width, height = self._size
+        return subprocess.Popen(
+            ["ffmpeg", "-loglevel", "error", "-y", "-f", "rawvideo", "-pix_fmt", "rgb24",
+             "-s", f"{width}x{height}", "-r", str(self.fps), "-i", "-",
+             "-pix_fmt", "yuv420p", self.output],
+            stdin=subprocess.PIPE)
+
+    def _run(self):
+        """Thread d'encodage : écrit les images jusqu'à la sentinelle None"""
+        index = 0
+        while True:
+            data = self._queue.get()
+            if data is None:
+                break
+            if self._error is not None:
+                continue  # Vider la file pour ne pas bloquer add()
+            try:
+                if self.output.lower().endswith(VIDEO_EXTENSIONS):
+                    if self._ffmpeg is None:
+                        self._ffmpeg = self._start_ffmpeg()
+                    self._ffmpeg.stdin.write(data)
+                else:
+                    image = pygame.image.frombytes(data, self._size, "RGB")
+                    pygame.image.save(image, os.path.join(self.output, f"frame_{index:06d}.png"))
+            except (OSError, pygame.error) as e:
+                self._error = e
+            index += 1
+
+    def close(self):
+        """Attend l'écriture des images en attente et termine la vidéo"""
+        self._queue.put(None)
+        self._worker.join()
+        if self._ffmpeg is not None:
+            self._ffmpeg.stdin.close()
+            self._ffmpeg.wait()
+        if self._error is not None:
+            raise self._error
+
+
+def record_run(output, map_file=None, seed=0, max_ticks=5000, every=1, scale=1.0, fps=30):
+    """
+    Simule une exécution et enregistre une image tous les every ticks avec
+    le rendu du jeu, sur le pilote vidéo factice de SDL (aucune fenêtre).
+    Retourne le nombre d'images écrites.
+    """
+    if every < 1:
+        raise ValueError(f"every doit être au moins 1 (reçu {every})")
+    # Lu par SDL à l'initialisation de l'affichage (dans Game)
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    random.seed(seed)
+    game = Game(map_file)
+    recorder = FrameRecorder(output, fps, scale)
+    try:
+        game.draw()
+        recorder.add(game.screen)
+        while not game.simulation.stopped and game.simulation.tick < max_ticks:
+            game.update()
+            if game.simulation.tick % every == 0 or game.simulation.stopped:
+                game.draw()
+                recorder.add(game.screen)
+    finally:
+        # Fermer le jeu même si la fin de l'encodage échoue
+        try:
+            recorder.close()
+        finally:
+            game.close()
+    return recorder.frames
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export d'une simulation en images PNG ou en vidéo")
+    parser.add_argument("output", help="Dossier d'images, ou fichier vidéo (.mp4, .webm, .gif...) via ffmpeg")
+    parser.add_argument("--map", default=None, help="Fichier de carte")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--max-ticks", type=int, default=5000)
+    parser.add_argument("--every", type=int, default=1, help="Une image tous les N ticks")
+    parser.add_argument("--scale", type=float, default=1.0, help="Facteur de taille des images")
+    parser.add_argument("--fps", type=int, default=30, help="Images par seconde de la vidéo")
+    args = parser.parse_args()
+    if args.every < 1:
+        parser.error("--every doit être au moins 1")
+
+    frames = record_run(args.output, args.map, args.seed, args.max_ticks, args.every, args.scale, args.fps)
+    print(f"{frames} images écrites dans {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,14 +1,20 @@
 """Gestion du rendu graphique"""
+import math
 import pygame
 from config import Config
 import agent
 
+# Couleur de fond transparente des glyphes d'agents
+SPRITE_COLORKEY = (255, 0, 255)
+
 class Renderer:
     """Gère tout l'affichage graphique"""
     
     def __init__(self, font):
         self.font = font
         self.victory_font = pygame.font.Font(None, 72)
+        self.small_font = pygame.font.Font(None, 20)
+        self._sprites = {}  # Taille de case (pixels) -> glyphes des agents
     
     def draw_ui(self, screen, env, simulation_speed):
         """Affiche l'interface utilisateur"""
@@ -43,6 +49,24 @@ class Renderer:
         screen.blit(vision_text, (Config.WIDTH - 250, base_y))
         screen.blit(speed_text, (Config.WIDTH - 250, base_y + 30))
     
+    def draw_performance(self, screen, tick_latency, frame_latency, agent_count):
+        """Affiche les mesures de performance sous les paramètres"""
+        base_y = Config.HEIGHT + 35
+        tick = tick_latency.summary()
+        lines = [
+            f"Ticks/s: {tick_latency.rate():.0f}  Agents: {agent_count}  Image: {frame_latency.last / 1e3:.1f} ms",
+            f"Tick: {tick_latency.last / 1e3:.2f} ms  p99: {tick['p99']:.2f}  max: {tick['max']:.2f}",
+        ]
+        for i, line in enumerate(lines):
+            text = self.small_font.render(line, True, (200, 200, 200))
+            screen.blit(text, (Config.WIDTH - 250, base_y + 55 + i * 18))
+
+    def draw_heatmap_label(self, screen, kind):
+        """Nom de la carte de chaleur affichée, en haut à gauche de la vue"""
+        label = "Passages" if kind == "visits" else "Blocages"
+        text = self.small_font.render(f"Carte de chaleur : {label}", True, (255, 255, 255))
+        screen.blit(text, (10, 10))
+
     def _draw_victory_message(self, screen, env):
         """Affiche le message de victoire"""
         if env.arrival_reached:
@@ -50,29 +74,63 @@ class Renderer:
             text_rect = victory_text.get_rect(center=(Config.WIDTH // 2, Config.HEIGHT // 2))
             screen.blit(victory_text, text_rect)
     
-    def draw_agents(self, screen, agents):
-        """Dessine tous les agents"""
-        for ag in agents:
-            if ag.role == "manager":
-                color = Config.MANAGER_COLOR
-            elif ag.role == "gatherer":
-                color = Config.GATHERER_COLOR
+    def _agent_sprites(self, cell):
+        """Glyphes des agents pour une taille de case, indexés par [role_code][chargé]"""
+        size = max(1, round(cell))
+        sprites = self._sprites.get(size)
+        if sprites is not None:
+            return sprites
+        
+        radius = max(1, round(6 * cell / Config.CELL_SIZE))
+        mark = max(1, round(3 * cell / Config.CELL_SIZE))
+        center = (size // 2, size // 2)
+        colors = {
+            agent.ROLE_GATHERER: Config.GATHERER_COLOR,
+            agent.ROLE_BUILDER: Config.BUILDER_COLOR,
+            agent.ROLE_MANAGER: Config.MANAGER_COLOR,
+        }
+        sprites = [None] * len(colors)
+        for role_code, color in colors.items():
+            # Transparence par couleur clé (bien plus rapide à copier qu'un canal alpha)
+            plain = pygame.Surface((size, size))
+            plain.fill(SPRITE_COLORKEY)
+            plain.set_colorkey(SPRITE_COLORKEY)
+            pygame.draw.circle(plain, color, center, radius)
+            loaded = plain.copy()
+            if role_code == agent.ROLE_BUILDER:
+                pygame.draw.rect(loaded, (255, 255, 255),
+                                 (center[0] - mark, center[1] - mark, 2 * mark, 2 * mark))
             else:
-                color = Config.BUILDER_COLOR
-            
-            pygame.draw.circle(screen, color,
-                             (ag.x * Config.CELL_SIZE + Config.CELL_SIZE//2,
-                              ag.y * Config.CELL_SIZE + Config.CELL_SIZE//2), 6)
-            
-            if ag.inventory:
-                if ag.role == "builder":
-                    pygame.draw.rect(screen, (255, 255, 255),
-                                   (ag.x * Config.CELL_SIZE + Config.CELL_SIZE//2 - 3,
-                                    ag.y * Config.CELL_SIZE + Config.CELL_SIZE//2 - 3, 6, 6))
-                else:
-                    pygame.draw.circle(screen, (34, 139, 34),
-                                     (ag.x * Config.CELL_SIZE + Config.CELL_SIZE//2,
-                                      ag.y * Config.CELL_SIZE + Config.CELL_SIZE//2), 3)
+                pygame.draw.circle(loaded, (34, 139, 34), center, mark)
+            if pygame.display.get_surface() is not None:
+                # Même format de pixels que l'écran : copie directe
+                plain, loaded = plain.convert(), loaded.convert()
+            sprites[role_code] = (plain, loaded)
+        self._sprites[size] = sprites
+        return sprites
+    
+    def draw_agents(self, screen, agents, camera=None):
+        """Dessine les agents visibles (ceux de la vue de camera si donnée) en un seul appel à blits"""
+        if camera is not None:
+            cell, left, top = camera.cell, camera.x, camera.y
+            c0, r0, c1, r1 = camera.visible_range()
+        else:
+            cell, left, top = Config.CELL_SIZE, 0, 0
+            c0 = r0 = 0
+            c1 = r1 = float('inf')
+        sprites = self._agent_sprites(cell)
+        # Détail de l'inventaire seulement si les cases sont assez grandes
+        show_inventory = cell >= Config.GRID_LINE_ZOOM
+        
+        floor = math.floor
+        batch = []
+        append = batch.append
+        for ag in agents:
+            x, y = ag.x, ag.y
+            if c0 <= x < c1 and r0 <= y < r1:
+                sprite = sprites[ag.role_code][1 if show_inventory and ag.inventory else 0]
+                append((sprite, (floor((x - left) * cell), floor((y - top) * cell))))
+        screen.blits(batch, doreturn=False)
     
     def draw_instructions(self, screen):
         """Affiche les instructions en haut du panneau UI"""
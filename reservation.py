@@ -0,0 +1,78 @@
+"""Table de réservations espace-temps pour le déplacement coopératif"""
+
+
+class ReservationTable:
+    """
+    Réservations (x, y, t) -> uid de l'agent.
+
+    Chaque agent qui planifie réserve les cases qu'il occupera aux ticks
+    suivants ; les autres planifient autour. Les arêtes sont aussi
+    réservées pour interdire que deux agents se croisent en échangeant
+    leurs cases.
+    """
+
+    def __init__(self):
+        self._cells = {}  # (x, y, t) -> uid
+        self._edges = {}  # ((x1, y1), (x2, y2), t) -> uid, déplacement de t à t + 1
+        self._by_agent = {}  # uid -> (clés de cases, clés d'arêtes)
+
+    def owner(self, x, y, t):
+        """Agent ayant réservé la case au tick t (None si libre)"""
+        return self._cells.get((x, y, t))
+
+    def is_free(self, x, y, t, uid):
+        """Vrai si la case est libre (ou réservée par l'agent lui-même) au tick t"""
+        owner = self._cells.get((x, y, t))
+        return owner is None or owner == uid
+
+    def is_move_free(self, start, end, t, uid):
+        """Vrai si le déplacement start -> end entre t et t + 1 ne croise personne"""
+        if not self.is_free(end[0], end[1], t + 1, uid):
+            return False
+        # Échange de cases : un autre agent fait end -> start au même moment
+        owner = self._edges.get((end, start, t))
+        return owner is None or owner == uid
+
+    def has_reservation(self, uid, t):
+        """Vrai si l'agent a une case réservée au tick t"""
+        keys = self._by_agent.get(uid)
+        return keys is not None and any(key[2] == t for key in keys[0])
+
+    def reserve_path(self, uid, start, path, t0):
+        """
+        Réserve un chemin : start au tick t0, puis path[i] au tick t0 + i + 1.
+        Les réservations précédentes de l'agent sont libérées.
+        """
+        self.release(uid)
+        cells = []
+        edges = []
+        previous = start
+        for dt, pos in enumerate([start] + list(path)):
+            key = (pos[0], pos[1], t0 + dt)
+            self._cells[key] = uid
+            cells.append(key)
+            if dt > 0 and pos != previous:
+                edge = (previous, pos, t0 + dt - 1)
+                self._edges[edge] = uid
+                edges.append(edge)
+            previous = pos
+        self._by_agent[uid] = (cells, edges)
+
+    def release(self, uid):
+        """Libère toutes les réservations d'un agent"""
+        keys = self._by_agent.pop(uid, None)
+        if keys is None:
+            return
+        cells, edges = keys
+        for key in cells:
+            if self._cells.get(key) == uid:
+                del self._cells[key]
+        for key in edges:
+            if self._edges.get(key) == uid:
+                del self._edges[key]
+
+    def clear(self):
+        """Supprime toutes les réservations"""
+        self._cells.clear()
+        self._edges.clear()
+        self._by_agent.clear()
@@ -0,0 +1,117 @@
+"""Analyse des étendues d'eau (rivières) d'une carte"""
+from collections import deque
+from config import Config
+
+
+class River:
+    """Une rivière : composante connexe de cases d'eau, analysée au chargement"""
+
+    def __init__(self, label, cells, grid):
+        self.label = label
+        self.cells = set(cells)  # Cases (x, y) de la rivière
+
+        # Colonnes d'eau par ligne et étendue (min, max) par ligne
+        self.row_cols = {}
+        for x, y in self.cells:
+            self.row_cols.setdefault(y, []).append(x)
+        for cols in self.row_cols.values():
+            cols.sort()
+        self.spans = {r: (cols[0], cols[-1]) for r, cols in self.row_cols.items()}
+        self.min_col = min(span[0] for span in self.spans.values())
+        self.max_col = max(span[1] for span in self.spans.values())
+
+        # Cases de berge : cases traversables adjacentes à la rivière
+        rows = len(grid)
+        cols = len(grid[0]) if grid else 0
+        self.banks = set()
+        for x, y in self.cells:
+            for dx, dy in ((1, 0), (-1, 0), (0, 1), (0, -1)):
+                nx, ny = x + dx, y + dy
+                if 0 <= nx < cols and 0 <= ny < rows and (nx, ny) not in self.cells:
+                    if grid[ny][nx] != Config.WALL:
+                        self.banks.add((nx, ny))
+
+        # Lignes de traversée triées de la plus courte à la plus longue
+        self.crossing_rows = sorted(self.row_cols, key=lambda r: (len(self.row_cols[r]), r))
+
+        # Nombre de cases d'eau restantes par ligne (mis à jour à chaque section de pont)
+        self.water_left = {r: len(cols) for r, cols in self.row_cols.items()}
+        self.complete_rows = set()
+
+    def mark_bridged(self, x, y):
+        """Enregistre qu'une case de la rivière est devenue un pont"""
+        if (x, y) not in self.cells:
+            return
+        self.water_left[y] -= 1
+        if self.water_left[y] == 0:
+            self.complete_rows.add(y)
+
+    def is_crossed(self):
+        """Vrai si au moins une ligne de la rivière est entièrement pontée"""
+        return bool(self.complete_rows)
+
+    def nearest_complete_row(self, y):
+        """Ligne de pont complète la plus proche de y (None si aucune)"""
+        if not self.complete_rows:
+            return None
+        return min(self.complete_rows, key=lambda r: (abs(r - y), r))
+
+    def best_crossing_row(self, y):
+        """Ligne de traversée la plus courte, départagée par la distance à y"""
+        shortest = len(self.row_cols[self.crossing_rows[0]])
+        candidates = [r for r in self.crossing_rows if len(self.row_cols[r]) == shortest]
+        return min(candidates, key=lambda r: (abs(r - y), r))
+
+    @staticmethod
+    def from_labels(labels, grid):
+        """Reconstruit (labels, rivers) à partir d'étiquettes déjà calculées par analyse"""
+        components = {}
+        for y, row in enumerate(labels):
+            for x, label in enumerate(row):
+                if label >= 0:
+                    components.setdefault(label, []).append((x, y))
+        rivers = [River(label, components[label], grid) for label in sorted(components)]
+        return labels, rivers
+
+    @staticmethod
+    def analyse(grid):
+        """
+        Étiquette les composantes connexes d'eau (4-voisinage) de la grille.
+
+        Retourne: (labels, rivers) où labels[y][x] est l'indice de la rivière
+        ou -1, et rivers la liste des rivières triée de gauche à droite.
+        """
+        rows = len(grid)
+        cols = len(grid[0]) if grid else 0
+        labels = [[-1] * cols for _ in range(rows)]
+        components = []
+
+        for r in range(rows):
+            for c in range(cols):
+                if grid[r][c] != Config.WATER or labels[r][c] != -1:
+                    continue
+                # Parcours en largeur de la composante
+                label = len(components)
+                labels[r][c] = label
+                cells = []
+                queue = deque([(c, r)])
+                while queue:
+                    x, y = queue.popleft()
+                    cells.append((x, y))
+                    for dx, dy in ((1, 0), (-1, 0), (0, 1), (0, -1)):
+                        nx, ny = x + dx, y + dy
+                        if 0 <= nx < cols and 0 <= ny < rows:
+                            if grid[ny][nx] == Config.WATER and labels[ny][nx] == -1:
+                                labels[ny][nx] = label
+                                queue.append((nx, ny))
+                components.append(cells)
+
+        rivers = [River(i, cells, grid) for i, cells in enumerate(components)]
+
+        # Renuméroter de gauche à droite (ordre de traversée vers l'arrivée)
+        rivers.sort(key=lambda river: (river.min_col, min(river.spans)))
+        for new_label, river in enumerate(rivers):
+            for x, y in river.cells:
+                labels[y][x] = new_label
+            river.label = new_label
+        return labels, rivers
@@ -0,0 +1,103 @@
+"""Ordonnanceur événementiel des agents"""
+import functools
+import heapq
+from environment import EVENT_HINT_GIVEN
+
+
+class AgentScheduler:
+    """
+    File de priorité des agents à exécuter.
+
+    Chaque agent est planifié au tick suivant (son prochain pas est dû) ou
+    mis en attente d'un événement de l'environnement ("wood_deposited",
+    "bridge_completed", ...) via Agent._wait_for. Seuls les agents dus sont
+    exécutés, le coût d'un tick dépend donc du nombre d'agents actifs et non
+    du nombre d'agents en attente. Un agent se déplaçant d'une case par
+    tick, il n'y a pas de réveil différé : seul un constructeur devant un
+    woodstock vide attend (un dépôt), les autres agents sont dus à chaque
+    tick.
+    """
+
+    def __init__(self, env, agents):
+        self.env = env
+        self.agents = agents
+        self.tick = 0
+        self._index = {id(agent): i for i, agent in enumerate(agents)}
+        # Ordre d'exécution dans un tick : les managers d'abord, puis l'ordre de la liste
+        self._order = [(agent.role != "manager", i) for i, agent in enumerate(agents)]
+        self._heap = []
+        self._wake_tick = {}  # indice -> tick de réveil planifié
+        self._waiting = {}  # événement -> ensemble d'indices
+        self._waiting_on = {}  # indice -> événement attendu
+
+        for i in range(len(agents)):
+            self._schedule(i, 0)
+
+        env.scheduler = self
+        env.subscribe(EVENT_HINT_GIVEN, self._on_hint)
+
+    def _schedule(self, index, tick):
+        """Planifie l'agent d'indice donné au tick donné"""
+        current = self._wake_tick.get(index)
+        if current is not None and current <= tick:
+            return
+        self._wake_tick[index] = tick
+        heapq.heappush(self._heap, (tick, self._order[index], index))
+
+    def wait_for(self, agent, event):
+        """Suspend l'agent jusqu'à l'émission de l'événement"""
+        index = self._index[id(agent)]
+        self._wake_tick.pop(index, None)
+        self._waiting_on[index] = event
+        if event not in self._waiting and event != EVENT_HINT_GIVEN:
+            # Premier agent à attendre cet événement : s'y abonner (une
+            # indication ne réveille que son destinataire, voir _on_hint)
+            self.env.subscribe(event, functools.partial(self._on_event, event))
+        self._waiting.setdefault(event, set()).add(index)
+
+    def wake(self, agent):
+        """Réveille un agent en attente pour le tick suivant"""
+        self._wake_index(self._index[id(agent)])
+
+    def _wake_index(self, index):
+        event = self._waiting_on.pop(index, None)
+        if event is not None:
+            self._waiting[event].discard(index)
+            self._schedule(index, self.tick + 1)
+
+    def _on_hint(self, agent):
+        """Réveille l'agent qui reçoit une indication"""
+        index = self._index.get(id(agent))
+        if index is not None:
+            self._wake_index(index)
+
+    def _on_event(self, event, data):
+        """Réveille les agents qui attendent un événement de l'environnement"""
+        for index in list(self._waiting.get(event, ())):
+            self._wake_index(index)
+
+    def is_waiting(self, agent):
+        """Vrai si l'agent attend un événement"""
+        return self._index[id(agent)] in self._waiting_on
+
+    def run_tick(self):
+        """Exécute les agents dus au tick courant, retourne leur nombre"""
+        due = []
+        while self._heap and self._heap[0][0] <= self.tick:
+            tick, order, index = heapq.heappop(self._heap)
+            # Entrée périmée (agent replanifié ou mis en attente entre-temps)
+            if self._wake_tick.get(index) != tick:
+                continue
+            del self._wake_tick[index]
+            due.append((order, index))
+        due.sort()
+
+        for _, index in due:
+            agent = self.agents[index]
+            agent.update(self.env, self.agents)
+            # Par défaut, le prochain pas est dû au tick suivant
+            if index not in self._waiting_on and index not in self._wake_tick:
+                self._schedule(index, self.tick + 1)
+
+        self.tick += 1
+        return len(due)
@@ -0,0 +1,271 @@
+"""Serveur asyncio hébergeant de nombreuses sessions de simulation sans affichage"""
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import pickle
+import random
+import time
+from config import Config
+from simulation import Simulation
+from agent import Agent
+from stream import snapshot_state
+
+DEFAULT_PORT = 47810
+
+
+class _SessionPickler(pickle.Pickler):
+    """Les agents référencent le module random partagé : il est enregistré par son nom"""
+
+    def persistent_id(self, obj):
+        return "random" if obj is random else None
+
+
+class _SessionUnpickler(pickle.Unpickler):
+    def persistent_load(self, pid):
+        if pid == "random":
+            return random
+        raise pickle.UnpicklingError(f"Référence inconnue : {pid!r}")
+
+
+class Session:
+    """
+    Une simulation avec son propre état d'aléa (le module random est partagé
+    par toutes les sessions du processus), les ticks qu'il lui reste à
+    simuler, le temps de calcul déjà consommé et l'erreur qui l'a arrêtée.
+    """
+
+    def __init__(self, session_id, map_file=None, seed=None):
+        self.id = session_id
+        self.map_file = map_file
+        saved = random.getstate()
+        random.seed(seed)
+        self.simulation = Simulation(map_file)
+        self.random_state = random.getstate()
+        random.setstate(saved)
+        self.pending = 0  # Ticks restant à simuler (None = jusqu'à la pause)
+        self.cpu_time = 0.0
+        self.last_active = time.monotonic()
+        self.error = None  # Exception levée par un tick (la session n'avance plus)
+
+    @property
+    def over_quota(self):
+        return Config.SESSION_CPU_QUOTA is not None and self.cpu_time >= Config.SESSION_CPU_QUOTA
+
+    @property
+    def runnable(self):
+        """Vrai s'il reste des ticks à simuler"""
+        return self.pending != 0 and not self.simulation.stopped and not self.over_quota and self.error is None
+
+    def run_slice(self, budget):
+        """Simule des ticks pendant au plus budget secondes de calcul (au moins un) ; retourne leur nombre"""
+        saved = random.getstate()
+        random.setstate(self.random_state)
+        # Liste des agents utilisée pour les collisions
+        Agent.all_agents = self.simulation.agents
+        start = time.process_time()
+        ticks = 0
+        try:
+            while self.runnable:
+                self.simulation.step()
+                ticks += 1
+                if self.pending is not None:
+                    self.pending -= 1
+                if time.process_time() - start >= budget:
+                    break
+        finally:
+            self.random_state = random.getstate()
+            random.setstate(saved)
+            self.cpu_time += time.process_time() - start
+            self.last_active = time.monotonic()
+        return ticks
+
+    def summary(self):
+        env = self.simulation.env
+        return {
+            "session": self.id,
+            "tick": env.tick,
+            "finished": env.arrival_reached,
+            "stop_reason": self.simulation.stop_reason,
+            "wood": env.woodstock["wood"],
+            "bridges": len(env.bridge_cells),
+            "agents": len(self.simulation.agents),
+            "running": self.pending is None and self.runnable,
+            "pending": self.pending,
+            "cpu_time": round(self.cpu_time, 4),
+            "over_quota": self.over_quota,
+            "error": self.error,
+        }
+
+
+class SessionServer:
+    """
+    Sessions avancées à tour de rôle par tranches de SESSION_SLICE_MS
+    millisecondes de calcul, la session la moins servie d'abord (partage
+    équitable, plafond optionnel SESSION_CPU_QUOTA par session). Une
+    session inactive depuis SESSION_IDLE_SECONDS est enregistrée sur disque
+    et libérée ; elle est rechargée à la requête suivante qui la concerne.
+
+    Protocole : une requête JSON par ligne, une réponse JSON par ligne.
+      {"cmd": "create", "map": ..., "seed": ...}   -> {"ok": true, "session": id}
+      {"cmd": "step", "session": id, "ticks": n}   -> résumé après les n ticks
+      {"cmd": "run" | "pause" | "query" | "snapshot" | "close", "session": id}
+      {"cmd": "list"}
+    """
+
+    def __init__(self, directory=None):
+        self.directory = directory or Config.SESSIONS_DIR
+        self.sessions = {}  # id -> Session en mémoire
+        self.evicted = set()  # ids des sessions enregistrées sur disque
+        self._ids = itertools.count(1)
+        self._waiters = {}  # id -> futures attendant la fin des ticks demandés
+        self._wakeup = asyncio.Event()
+
+    def _path(self, session_id):
+        return os.path.join(self.directory, f"session_{session_id}.pickle")
+
+    def _session(self, session_id):
+        """Session en mémoire (rechargée depuis le disque si besoin)"""
+        session = self.sessions.get(session_id)
+        if session is None:
+            if session_id not in self.evicted:
+                raise KeyError(f"Session inconnue : {session_id}")
+            with open(self._path(session_id), "rb") as f:
+                session = _SessionUnpickler(f).load()
+            os.remove(self._path(session_id))
+            self.evicted.discard(session_id)
+            self.sessions[session_id] = session
+        session.last_active = time.monotonic()
+        return session
+
+    def evict(self, session):
+        """Enregistre une session sur disque et la libère (False si elle n'est pas sérialisable)"""
+        os.makedirs(self.directory, exist_ok=True)
+        tmp = self._path(session.id) + ".tmp"
+        try:
+            with open(tmp, "wb") as f:
+                _SessionPickler(f, pickle.HIGHEST_PROTOCOL).dump(session)
+        except (pickle.PicklingError, TypeError, AttributeError) as e:
+            os.remove(tmp)
+            print(f"Session {session.id} gardée en mémoire ({e})")
+            session.last_active = time.monotonic()
+            return False
+        os.replace(tmp, self._path(session.id))
+        del self.sessions[session.id]
+        self.evicted.add(session.id)
+        return True
+
+    def _notify(self, session):
+        """Réveille les requêtes step d'une session qui n'a plus rien à simuler"""
+        for future in self._waiters.pop(session.id, ()):
+            if not future.done():
+                future.set_result(None)
+
+    async def schedule(self):
+        """Boucle d'exécution : une tranche par session à simuler, la moins servie d'abord"""
+        budget = Config.SESSION_SLICE_MS / 1000
+        while True:
+            runnable = [s for s in self.sessions.values() if s.runnable]
+            if not runnable:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+            for session in sorted(runnable, key=lambda s: s.cpu_time):
+                try:
+                    session.run_slice(budget)
+                except Exception as e:
+                    # Une session en échec ne doit pas arrêter les autres
+                    session.error = f"{type(e).__name__}: {e}"
+                    print(f"Session {session.id} arrêtée ({session.error})")
+                if not session.runnable:
+                    self._notify(session)
+                # Laisser passer les requêtes entre deux tranches
+                await asyncio.sleep(0)
+
+    async def evict_idle(self):
+        """Enregistre sur disque les sessions inactives"""
+        while True:
+            await asyncio.sleep(Config.SESSION_IDLE_SECONDS / 4)
+            limit = time.monotonic() - Config.SESSION_IDLE_SECONDS
+            for session in list(self.sessions.values()):
+                if session.last_active < limit and not session.runnable and session.id not in self._waiters:
+                    self.evict(session)
+
+    async def execute(self, request):
+        """Exécute une requête et retourne la réponse"""
+        command = request.get("cmd")
+        if command == "create":
+            session = Session(next(self._ids), request.get("map"), request.get("seed"))
+            self.sessions[session.id] = session
+            return {"ok": True, "session": session.id}
+        if command == "list":
+            return {"ok": True, "sessions": [s.summary() for s in self.sessions.values()],
+                    "evicted": sorted(self.evicted)}
+
+        session = self._session(request.get("session"))
+        if command == "step":
+            ticks = int(request.get("ticks", 1))
+            if ticks < 1:
+                raise ValueError(f"ticks doit être au moins 1 (reçu {ticks})")
+            session.pending = (session.pending or 0) + ticks
+            if session.runnable:
+                future = asyncio.get_running_loop().create_future()
+                self._waiters.setdefault(session.id, []).append(future)
+                self._wakeup.set()
+                await future
+        elif command == "run":
+            session.pending = None
+            self._wakeup.set()
+        elif command == "pause":
+            session.pending = 0
+            self._notify(session)
+        elif command == "snapshot":
+            return {"ok": True, "state": snapshot_state(session.simulation.env, session.simulation.agents)}
+        elif command == "close":
+            session.pending = 0
+            self._notify(session)
+            del self.sessions[session.id]
+            return {"ok": True}
+        elif command != "query":
+            raise ValueError(f"Commande inconnue : {command!r}")
+        return {"ok": session.error is None, **session.summary()}
+
+    async def handle(self, reader, writer):
+        """Une connexion : requêtes JSON ligne par ligne"""
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    response = await self.execute(json.loads(line))
+                except (ValueError, KeyError, TypeError, OSError) as e:
+                    response = {"ok": False, "error": str(e.args[0]) if e.args else repr(e)}
+                writer.write(json.dumps(response).encode() + b"\n")
+                await writer.drain()
+        finally:
+            writer.close()
+
+    async def serve(self, host="127.0.0.1", port=DEFAULT_PORT):
+        server = await asyncio.start_server(self.handle, host, port)
+        async with server:
+            await asyncio.gather(server.serve_forever(), self.schedule(), self.evict_idle())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serveur de sessions de simulation (JSON ligne par ligne)")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--dir", default=None, help="Dossier des sessions inactives")
+    args = parser.parse_args()
+
+    print(f"Sessions servies sur {args.host}:{args.port}")
+    try:
+        asyncio.run(SessionServer(args.dir).serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+"""Moteur de simulation sans affichage"""
+import time
+from config import Config
+from environment import Environment
+from agent import Agent, ROLE_MANAGER
+from scheduler import AgentScheduler
+from intent import TwoPhaseTick
+from reservation import ReservationTable
+from pathfinding import HierarchicalPlanner
+from connectivity import ConnectivityIndex
+from bitboard import TerrainBitboards
+from density import WoodDensity
+from heatmap import TrafficHeatmap
+from stall import StallDetector, REASON_ARRIVAL
+from zobrist import ZobristHash
+from metrics import LatencyHistogram
+
+
+class Simulation:
+    """Environnement + agents, avancés tick par tick (sans pygame)"""
+
+    def __init__(self, map_file=None):
+        self.map_file = map_file
+        self.env = None
+        self.agents = []
+        self.scheduler = None
+        self.two_phase = None
+        self.stall = None
+        self.tick_latency = LatencyHistogram()  # Durée réelle de chaque tick
+        self.reset()
+
+    def reset(self):
+        """Réinitialise l'environnement et les agents"""
+        self.env = Environment(self.map_file)
+        self.agents = []
+        self.tick_latency.reset()
+
+        rows = self.env.rows
+        cols = self.env.cols
+
+        # Récolteurs (positions adaptées à la taille de la carte)
+        for i in range(Config.NUM_GATHERERS):
+            y = min(2 + i * 2, rows - 1)
+            self.agents.append(Agent(min(2, cols - 1), y, "gatherer"))
+        # Constructeurs
+        for i in range(Config.NUM_BUILDERS):
+            y = min(2 + i * 2, rows - 1)
+            self.agents.append(Agent(min(3, cols - 1), y, "builder"))
+        # Chefs de projet (managers)
+        for i in range(Config.NUM_MANAGERS):
+            y = min(rows // 2 + i * 2, rows - 1)
+            self.agents.append(Agent(min(4, cols - 1), y, "manager"))
+
+        # Mettre à jour la liste partagée des agents pour la détection de collision
+        Agent.all_agents = self.agents
+        self.stall_reason = None
+
+        # Tick en deux phases (optionnel, prioritaire sur l'ordonnanceur)
+        if self.two_phase is not None:
+            self.two_phase.close()
+        self.two_phase = None
+        self.scheduler = None
+        if Config.TWO_PHASE_TICK:
+            self.two_phase = TwoPhaseTick(self.env, self.agents, Config.INTENT_WORKERS)
+        elif Config.EVENT_SCHEDULER:
+            # Ordonnanceur événementiel (optionnel)
+            self.scheduler = AgentScheduler(self.env, self.agents)
+        
+        # Index de connexité pour écarter les cibles inatteignables (optionnel)
+        if Config.CONNECTIVITY_INDEX:
+            self.env.connectivity = ConnectivityIndex(self.env)
+        
+        # Couches de bits du terrain pour les recherches des agents (optionnelles)
+        if Config.BITBOARDS:
+            self.env.bitboards = TerrainBitboards(self.env)
+        
+        # Densité de bois pour la répartition des récolteurs (optionnelle)
+        if Config.WOOD_DENSITY_DISPATCH:
+            self.env.wood_density = WoodDensity(self.env)
+        
+        # Carte de chaleur des passages et blocages (optionnelle)
+        if Config.TRAFFIC_HEATMAP:
+            self.env.heatmap = TrafficHeatmap(self.env)
+        
+        # Arrêt anticipé des exécutions perdues d'avance (optionnel)
+        self.stall = StallDetector(self.env, self.agents) if Config.STALL_DETECTION else None
+        
+        # Empreinte de l'état du monde, enregistrée à chaque tick (optionnelle)
+        if Config.ZOBRIST_HASH:
+            self.env.zobrist = ZobristHash(self.env, self.agents)
+        
+        # Planificateur hiérarchique (optionnel)
+        if Config.HIERARCHICAL_PATHFINDING:
+            self.env.planner = HierarchicalPlanner(self.env, Config.CLUSTER_SIZE)
+        
+        # Déplacement coopératif (incompatible avec le calcul des intentions en parallèle)
+        if Config.COOPERATIVE_PATHFINDING and Config.PREVENT_COLLISION and not Config.TWO_PHASE_TICK:
+            self.env.reservations = ReservationTable()
+
+    @property
+    def tick(self):
+        """Nombre de ticks simulés"""
+        return self.env.tick
+
+    @property
+    def finished(self):
+        """Vrai si un manager a atteint l'arrivée"""
+        return self.env.arrival_reached
+
+    @property
+    def stopped(self):
+        """Vrai si l'exécution est terminée : arrivée atteinte ou arrêtée par le détecteur"""
+        return self.env.arrival_reached or self.stall_reason is not None
+
+    @property
+    def stop_reason(self):
+        """Raison de la fin de l'exécution (constantes REASON_* de stall.py), None si elle continue"""
+        return REASON_ARRIVAL if self.env.arrival_reached else self.stall_reason
+
+    def step(self):
+        """Avance la simulation d'un tick"""
+        if self.stopped:
+            return
+
+        start = time.perf_counter()
+        if self.two_phase is not None:
+            self.two_phase.run_tick()
+        elif self.scheduler is not None:
+            self.scheduler.run_tick()
+        else:
+            # Le manager s'exécute EN PREMIER pour distribuer les hints
+            for agent in self.agents:
+                if agent.role_code == ROLE_MANAGER:
+                    agent.update(self.env, self.agents)
+
+            # Ensuite les autres agents
+            for agent in self.agents:
+                if agent.role_code != ROLE_MANAGER:
+                    agent.update(self.env, self.agents)
+
+        self.end_tick()
+        self.tick_latency.record(time.perf_counter() - start)
+
+    def end_tick(self):
+        """Clôt un tick (aussi appelé par MultiAgentEnv.step) : compteur, événements et relevés"""
+        self.env.tick += 1
+        # Événements du tick aux abonnés par lots (avant les compteurs par tick)
+        self.env.flush_events()
+        if self.env.heatmap is not None:
+            self.env.heatmap.record(self.agents)
+        if self.env.zobrist is not None:
+            self.env.zobrist.record()
+        if self.stall is not None and not self.env.arrival_reached \
+                and self.env.tick % Config.STALL_CHECK_INTERVAL == 0:
+            self.stall_reason = self.stall.check()
@@ -0,0 +1,116 @@
+"""Détection des exécutions bloquées ou perdues d'avance"""
+import heapq
+from config import Config
+from agent import ROLE_MANAGER
+from environment import EVENT_CELL_CHANGED, EVENT_WOOD_DEPOSITED, EVENT_WOOD_WITHDRAWN, EVENT_BRIDGE_PROGRESS
+
+# Raisons d'arrêt (Simulation.stop_reason)
+REASON_ARRIVAL = "arrival"  # Un manager a atteint l'arrivée
+REASON_UNREACHABLE = "arrival_unreachable"  # Des murs séparent les managers de l'arrivée
+REASON_OUT_OF_WOOD = "out_of_wood"  # Le bois restant ne suffit plus à ponter un chemin
+REASON_NO_PROGRESS = "no_progress"  # Aucun bois déplacé ni section posée depuis STALL_TICKS
+
+
+class StallDetector:
+    """
+    Termine tôt une exécution dont l'issue est décidée.
+
+    L'offre de bois (arbres restants, woodstock, bois porté par les agents)
+    est comparée à la demande : le nombre minimal de cases d'eau sur les
+    chemins des managers vers l'arrivée (Dijkstra, les autres cases coûtant
+    0). Un constructeur garde son bois jusqu'à ce que la section soit
+    terminée, une section ne consomme donc qu'une unité quelle que soit
+    WOOD_NEEDED_PER_BRIDGE_CELL. L'offre ne peut que baisser et la demande
+    ne baisse que d'une unité par section terminée : quand l'offre est
+    inférieure à la demande, l'arrivée est hors d'atteinte. La demande
+    n'est recalculée que si une section a été terminée depuis le calcul
+    précédent et que l'offre ne couvre pas toute l'eau restante.
+
+    Un repère de progression (dernier tick où du bois a été récolté,
+    déposé, retiré ou posé) arrête aussi les exécutions sans progrès
+    depuis STALL_TICKS ticks.
+    """
+
+    def __init__(self, env, agents):
+        self.env = env
+        self.agents = agents
+        self.trees = 0
+        self.water = 0
+        for row in env.grid:
+            for cell in row:
+                if cell == Config.WOOD:
+                    self.trees += 1
+                elif cell == Config.WATER:
+                    self.water += 1
+        self.last_progress = env.tick  # Repère de progression
+        self._demand = None  # (cases d'eau restantes, demande) du dernier calcul
+        # Les murs sont fixes : une arrivée coupée des managers le reste
+        self.unreachable = self.demand() is None
+        env.subscribe(EVENT_CELL_CHANGED, self._on_cell_changed)
+        env.subscribe(EVENT_BRIDGE_PROGRESS, self._on_progress)
+        env.subscribe(EVENT_WOOD_DEPOSITED, self._on_progress)
+        env.subscribe(EVENT_WOOD_WITHDRAWN, self._on_progress)
+
+    def _on_cell_changed(self, data):
+        x, y, old, new = data
+        self.trees += (new == Config.WOOD) - (old == Config.WOOD)
+        self.water += (new == Config.WATER) - (old == Config.WATER)
+        self.last_progress = self.env.tick
+
+    def _on_progress(self, data):
+        self.last_progress = self.env.tick
+
+    def supply(self):
+        """Bois encore utilisable : arbres, woodstock et bois porté"""
+        carried = sum(1 for agent in self.agents if agent.inventory == "wood")
+        return self.trees + self.env.woodstock["wood"] + carried
+
+    def demand(self):
+        """Sections minimales à terminer pour qu'un manager rejoigne l'arrivée (None si impossible)"""
+        env = self.env
+        rows, cols = env.rows, env.cols
+        grid = env.grid
+        best = {}
+        heap = []
+        for agent in self.agents:
+            if agent.role_code == ROLE_MANAGER:
+                best[(agent.x, agent.y)] = 0
+                heap.append((0, agent.x, agent.y))
+        heapq.heapify(heap)
+        target = env.arrival_pos
+        while heap:
+            cost, x, y = heapq.heappop(heap)
+            if (x, y) == target:
+                return cost
+            if cost > best[(x, y)]:
+                continue
+            for nx, ny in ((x + 1, y), (x - 1, y), (x, y + 1), (x, y - 1)):
+                if not (0 <= nx < cols and 0 <= ny < rows):
+                    continue
+                cell = grid[ny][nx]
+                if cell == Config.WALL:
+                    continue
+                step = cost + (cell == Config.WATER)
+                if step < best.get((nx, ny), step + 1):
+                    best[(nx, ny)] = step
+                    heapq.heappush(heap, (step, nx, ny))
+        return None
+
+    def check(self):
+        """Raison d'arrêter l'exécution (voir REASON_*), ou None"""
+        if self.unreachable:
+            return REASON_UNREACHABLE
+        supply = self.supply()
+        # Toute l'eau restante peut être pontée : inutile de chercher un chemin
+        if supply < self.water:
+            if self._demand is None or self._demand[0] != self.water:
+                # Les managers ne quittent leur région que par un pont : la
+                # demande ne change qu'avec les sections terminées
+                self._demand = (self.water, self.demand())
+            demand = self._demand[1]
+            if demand is not None and supply < demand:
+                return REASON_OUT_OF_WOOD
+
+        if Config.STALL_TICKS and self.env.tick - self.last_progress >= Config.STALL_TICKS:
+            return REASON_NO_PROGRESS
+        return None
@@ -0,0 +1,367 @@
+"""Simulation dans un processus, affichage dans d'autres (flux de deltas sur une socket)"""
+import argparse
+import base64
+import json
+import random
+import socket
+import struct
+import time
+from collections import deque
+from config import Config
+from environment import Environment, EVENT_CELL_CHANGED
+from simulation import Simulation
+from metrics import LatencyHistogram
+from batch import TERRAIN_CODES
+
+DEFAULT_PORT = 47800
+
+# Messages : en-tête (type, taille du contenu) puis contenu
+MSG_SNAPSHOT = 1  # État complet en JSON (à la connexion, ou après un retard trop grand)
+MSG_DELTA = 2     # Changements d'un tick, en binaire
+HEADER = struct.Struct("!BI")
+DELTA_HEADER = struct.Struct("!IIB")  # tick, bois au woodstock, arrivée atteinte
+COUNT = struct.Struct("!I")
+AGENT_DELTA = struct.Struct("!IHHB")  # indice, x, y, porte du bois
+CELL_DELTA = struct.Struct("!HHB")  # x, y, code de terrain
+PROGRESS_DELTA = struct.Struct("!HHB")  # ligne, colonne, bois apporté
+
+TERRAIN_COLORS = {code: color for color, code in TERRAIN_CODES.items()}
+
+# Au-delà, un spectateur trop lent perd ses deltas en attente et reçoit un nouvel état complet
+MAX_PENDING_BYTES = 4 * 1024 * 1024
+
+
+def encode_message(kind, payload):
+    return HEADER.pack(kind, len(payload)) + payload
+
+
+def snapshot_state(env, agents):
+    """État complet de l'environnement et des agents (sérialisable en JSON)"""
+    codes = bytes(TERRAIN_CODES[cell] for row in env.grid for cell in row)
+    return {
+        "rows": env.rows,
+        "cols": env.cols,
+        "grid": base64.b64encode(codes).decode(),
+        "woodstock_pos": env.woodstock_pos,
+        "arrival_pos": env.arrival_pos,
+        "wood": env.woodstock["wood"],
+        "bridge_cells": env.bridge_cells,
+        "bridge_progress": [(row, col, progress) for (row, col), progress in env.bridge_progress.items()],
+        "arrival": env.arrival_reached,
+        "tick": env.tick,
+        "agents": [(a.x, a.y, a.role_code, bool(a.inventory)) for a in agents],
+    }
+
+
+def snapshot_message(env, agents):
+    return encode_message(MSG_SNAPSHOT, json.dumps(snapshot_state(env, agents)).encode())
+
+
+class SimulationServer:
+    """
+    Avance une simulation et diffuse après chaque tick ce qui a changé
+    (agents déplacés ou chargés, cases modifiées, avancement des ponts,
+    compteurs) à tous les spectateurs connectés.
+
+    Les sockets sont non bloquantes : la simulation n'attend jamais un
+    spectateur. Les messages en attente d'un spectateur trop lent sont
+    abandonnés au-delà de MAX_PENDING_BYTES et remplacés par un état complet.
+    """
+
+    def __init__(self, simulation, host="127.0.0.1", port=DEFAULT_PORT):
+        self.simulation = simulation
+        self.listener = socket.create_server((host, port))
+        self.listener.setblocking(False)
+        self.clients = {}  # socket -> [messages en attente, octets déjà envoyés du premier, taille totale]
+        env = simulation.env
+        self._changed = {}  # (x, y) -> code de terrain, depuis le dernier delta
+        self._sent_agents = [(a.x, a.y, bool(a.inventory)) for a in simulation.agents]
+        self._sent_progress = dict(env.bridge_progress)
+        env.subscribe(EVENT_CELL_CHANGED, self._on_cells_changed, batched=True)
+
+    def _on_cells_changed(self, changes):
+        """Cases modifiées pendant le tick, reçues en un lot avant publish"""
+        for x, y, _, new in changes:
+            self._changed[(x, y)] = TERRAIN_CODES[new]
+
+    def _delta(self):
+        """Message des changements depuis le delta précédent"""
+        env = self.simulation.env
+        sent = self._sent_agents
+        agents = []
+        for index, a in enumerate(self.simulation.agents):
+            state = (a.x, a.y, bool(a.inventory))
+            if state != sent[index]:
+                sent[index] = state
+                agents.append(AGENT_DELTA.pack(index, *state))
+        cells = [CELL_DELTA.pack(x, y, code) for (x, y), code in self._changed.items()]
+        self._changed.clear()
+        progress = []
+        for (row, col), amount in env.bridge_progress.items():
+            if self._sent_progress.get((row, col)) != amount:
+                self._sent_progress[(row, col)] = amount
+                progress.append(PROGRESS_DELTA.pack(row, col, min(amount, 255)))
+
+        parts = [DELTA_HEADER.pack(env.tick, env.woodstock["wood"], env.arrival_reached)]
+        for items in (agents, cells, progress):
+            parts.append(COUNT.pack(len(items)))
+            parts.extend(items)
+        return encode_message(MSG_DELTA, b"".join(parts))
+
+    def publish(self):
+        """Ajoute le delta du tick écoulé aux messages de chaque spectateur"""
+        message = self._delta()
+        snapshot = None
+        for pending in self.clients.values():
+            if pending[2] + len(message) > MAX_PENDING_BYTES:
+                # Garder le message en cours d'envoi, remplacer le reste par un état complet
+                if snapshot is None:
+                    snapshot = snapshot_message(self.simulation.env, self.simulation.agents)
+                messages = pending[0]
+                kept = [messages[0]] if messages and pending[1] else []
+                messages.clear()
+                messages.extend(kept + [snapshot])
+                pending[2] = sum(len(m) for m in messages)
+            else:
+                pending[0].append(message)
+                pending[2] += len(message)
+
+    def accept(self):
+        """Accepte les nouveaux spectateurs (qui reçoivent d'abord l'état complet)"""
+        while True:
+            try:
+                sock, _ = self.listener.accept()
+            except BlockingIOError:
+                return
+            sock.setblocking(False)
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            snapshot = snapshot_message(self.simulation.env, self.simulation.agents)
+            self.clients[sock] = [deque([snapshot]), 0, len(snapshot)]
+
+    def flush(self):
+        """Envoie ce que chaque socket accepte sans attendre"""
+        for sock, pending in list(self.clients.items()):
+            messages = pending[0]
+            try:
+                while messages:
+                    view = memoryview(messages[0])[pending[1]:]
+                    sent = sock.send(view)
+                    pending[1] += sent
+                    pending[2] -= sent
+                    if sent < len(view):
+                        break
+                    messages.popleft()
+                    pending[1] = 0
+            except BlockingIOError:
+                continue
+            except OSError:
+                # Spectateur déconnecté
+                del self.clients[sock]
+                sock.close()
+
+    def run(self, tick_rate=None, max_ticks=None):
+        """
+        Avance la simulation (au plus tick_rate ticks par seconde) et sert les
+        spectateurs ; continue de les servir une fois la simulation terminée.
+        """
+        interval = 1.0 / tick_rate if tick_rate else 0.0
+        next_tick = time.perf_counter()
+        simulation = self.simulation
+        while True:
+            if not simulation.stopped and (max_ticks is None or simulation.tick < max_ticks):
+                simulation.step()
+                self.publish()
+            else:
+                time.sleep(0.05)
+            self.accept()
+            self.flush()
+            if interval:
+                next_tick += interval
+                delay = next_tick - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                else:
+                    next_tick = time.perf_counter()
+
+    def close(self):
+        for sock in self.clients:
+            sock.close()
+        self.clients.clear()
+        self.listener.close()
+
+
+class ViewerEnvironment(Environment):
+    """Copie d'affichage d'un environnement distant (ni chargement de carte ni rivières)"""
+
+    def __init__(self, state):
+        self.rows = state["rows"]
+        self.cols = state["cols"]
+        codes = base64.b64decode(state["grid"])
+        self.grid = [[TERRAIN_COLORS[codes[r * self.cols + c]] for c in range(self.cols)]
+                     for r in range(self.rows)]
+        self.woodstock_pos = tuple(state["woodstock_pos"])
+        self.arrival_pos = tuple(state["arrival_pos"])
+        self.woodstock = {"wood": state["wood"]}
+        self.bridge_cells = [tuple(cell) for cell in state["bridge_cells"]]
+        self.bridge_progress = {(row, col): amount for row, col, amount in state["bridge_progress"]}
+        self.arrival_reached = state["arrival"]
+        self.tick = state["tick"]
+        self._setup_events()
+        self.heatmap = None
+        self._overview = None
+
+
+class RemoteAgent:
+    """État affiché d'un agent distant"""
+
+    __slots__ = ("x", "y", "role_code", "inventory")
+
+    def __init__(self, x, y, role_code, carrying):
+        self.x = x
+        self.y = y
+        self.role_code = role_code
+        self.inventory = "wood" if carrying else None
+
+
+class RemoteSimulation:
+    """
+    Copie locale d'une simulation servie par SimulationServer, avec
+    l'interface utilisée par Game : step() applique les messages reçus
+    depuis l'appel précédent (sans attendre), reset() ne fait rien.
+    """
+
+    def __init__(self, host="127.0.0.1", port=DEFAULT_PORT):
+        self.sock = socket.create_connection((host, port))
+        self.env = None
+        self.agents = []
+        self.closed = False
+        self.tick_latency = LatencyHistogram()  # Durée d'application des messages reçus
+        self._buffer = bytearray()
+        # Attendre l'état complet initial
+        while self.env is None:
+            self._receive()
+            self._apply_messages()
+        self.sock.setblocking(False)
+
+    @property
+    def tick(self):
+        return self.env.tick
+
+    @property
+    def finished(self):
+        return self.env.arrival_reached
+
+    def reset(self):
+        """La simulation appartient au serveur : rien à réinitialiser"""
+
+    def _receive(self):
+        """Lit les octets disponibles ; False quand il n'y en a plus"""
+        try:
+            data = self.sock.recv(1 << 16)
+        except BlockingIOError:
+            return False
+        if not data:
+            self.closed = True
+            return False
+        self._buffer += data
+        return True
+
+    def step(self):
+        """Applique tous les messages reçus"""
+        if self.closed:
+            return
+        start = time.perf_counter()
+        try:
+            while self._receive():
+                pass
+        except OSError:
+            self.closed = True
+        if self._apply_messages():
+            self.tick_latency.record(time.perf_counter() - start)
+
+    def _apply_messages(self):
+        """Applique les messages complets du tampon, retourne leur nombre"""
+        buffer = self._buffer
+        applied = 0
+        while len(buffer) >= HEADER.size:
+            kind, size = HEADER.unpack_from(buffer)
+            end = HEADER.size + size
+            if len(buffer) < end:
+                break
+            payload = bytes(buffer[HEADER.size:end])
+            del buffer[:end]
+            if kind == MSG_SNAPSHOT:
+                self._apply_snapshot(json.loads(payload))
+            elif kind == MSG_DELTA:
+                self._apply_delta(payload)
+            applied += 1
+        return applied
+
+    def _apply_snapshot(self, state):
+        self.env = ViewerEnvironment(state)
+        self.agents = [RemoteAgent(*agent) for agent in state["agents"]]
+
+    def _apply_delta(self, payload):
+        env = self.env
+        tick, wood, arrival = DELTA_HEADER.unpack_from(payload)
+        offset = DELTA_HEADER.size
+        sections = []
+        for record in (AGENT_DELTA, CELL_DELTA, PROGRESS_DELTA):
+            count = COUNT.unpack_from(payload, offset)[0]
+            offset += COUNT.size
+            end = offset + count * record.size
+            sections.append(record.iter_unpack(payload[offset:end]))
+            offset = end
+        agents, cells, progress = sections
+
+        for index, x, y, carrying in agents:
+            agent = self.agents[index]
+            agent.x, agent.y = x, y
+            agent.inventory = "wood" if carrying else None
+        for x, y, code in cells:
+            color = TERRAIN_COLORS[code]
+            env.set_cell(x, y, color)
+            if color == Config.BRIDGE:
+                env.bridge_cells.append((y, x))
+        for row, col, amount in progress:
+            env.bridge_progress[(row, col)] = amount
+        env.tick = tick
+        env.woodstock["wood"] = wood
+        env.arrival_reached = bool(arrival)
+        if env.heatmap is not None:
+            env.heatmap.record(self.agents)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulation et spectateurs dans des processus séparés")
+    commands = parser.add_subparsers(dest="command", required=True)
+    serve = commands.add_parser("serve", help="Exécute la simulation et diffuse ses changements")
+    serve.add_argument("--map", default=None, help="Fichier de carte")
+    serve.add_argument("--seed", type=int, default=None)
+    serve.add_argument("--tick-rate", type=float, default=Config.STREAM_TICK_RATE,
+                       help="Ticks par seconde (0 = au plus vite)")
+    view = commands.add_parser("view", help="Affiche une simulation servie")
+    for command in (serve, view):
+        command.add_argument("--host", default="127.0.0.1")
+        command.add_argument("--port", type=int, default=DEFAULT_PORT)
+    args = parser.parse_args()
+
+    if args.command == "serve":
+        if args.seed is not None:
+            random.seed(args.seed)
+        server = SimulationServer(Simulation(args.map), args.host, args.port)
+        print(f"Simulation servie sur {args.host}:{args.port}")
+        try:
+            server.run(args.tick_rate)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.close()
+    else:
+        from game import Game  # pygame n'est nécessaire que pour afficher
+
+        Game(simulation=RemoteSimulation(args.host, args.port)).run()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,27 @@
+"""Tests du planificateur hiérarchique"""
+import types
+from config import Config
+from pathfinding import HierarchicalPlanner
+
+
+def make_planner(grid, cluster_size):
+    """Planificateur sur une grille donnée (environnement minimal, sans cache)"""
+    env = types.SimpleNamespace(grid=grid, rows=len(grid), cols=len(grid[0]), map_cache=None,
+                                bridge_cells=[], subscribe=lambda event, handler: None)
+    return HierarchicalPlanner(env, cluster_size)
+
+
+def test_start_on_entrance():
+    """Un départ sur une entrée de cluster emprunte directement son passage"""
+    # Couloir de 20 cases (ligne 1 en mur) : entrées (9, 0) et (10, 0)
+    planner = make_planner([[Config.LAND] * 20, [Config.WALL] * 20], 10)
+    assert planner.find_path((8, 0), (15, 0)) == [(9, 0), (10, 0), (15, 0)]
+    assert planner.find_path((9, 0), (15, 0)) == [(10, 0), (15, 0)]
+    assert planner.find_path((15, 0), (10, 0)) == [(10, 0)]
+
+
+def test_goal_on_start_entrance():
+    """Départ sur une entrée qui est aussi reliée au but de l'autre côté"""
+    planner = make_planner([[Config.LAND] * 20, [Config.WALL] * 20], 10)
+    assert planner.find_path((10, 0), (9, 0)) == [(9, 0)]
+    assert planner.find_path((10, 0), (3, 0)) == [(9, 0), (3, 0)]
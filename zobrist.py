@@ -0,0 +1,157 @@
+"""Empreinte Zobrist de l'état du monde (comparaison de trajectoires, états répétés)"""
+import argparse
+import random
+from collections import deque
+from config import Config
+from environment import EVENT_CELL_CHANGED, EVENT_WOOD_DEPOSITED, EVENT_WOOD_WITHDRAWN, EVENT_BRIDGE_PROGRESS
+from batch import TERRAIN_CODES
+
+MASK = (1 << 64) - 1
+
+# Composantes de l'état (premier champ des clés)
+KEY_TERRAIN, KEY_PROGRESS, KEY_WOODSTOCK, KEY_AGENT = range(4)
+
+
+def _key(kind, a, b=0):
+    """Clé pseudo-aléatoire de 64 bits d'un élément d'état (splitmix64, sans table ni aléa global)"""
+    z = ((kind << 58) ^ (a << 29) ^ b) & MASK
+    z = (z + 0x9E3779B97F4A7C15) & MASK
+    z = ((z ^ (z >> 30)) * 0xBF58476D1CE4E5B9) & MASK
+    z = ((z ^ (z >> 27)) * 0x94D049BB133111EB) & MASK
+    return z ^ (z >> 31)
+
+
+class ZobristHash:
+    """
+    Empreinte de 64 bits du terrain, de l'avancement du pont, du woodstock
+    et de la position et de l'inventaire de chaque agent : le OU exclusif
+    d'une clé par élément. Chaque changement la met à jour en O(1) en
+    retirant l'ancienne clé et en ajoutant la nouvelle : cases, woodstock
+    et avancement du pont via les événements de l'environnement, agents
+    depuis Agent._step_to et Agent._carry.
+
+    Le tick et l'état interne des agents (cibles, compteurs) n'en font pas
+    partie : deux ticks de même empreinte montrent le même monde.
+
+    Les cases et l'avancement du pont ne changent que dans un sens (arbre
+    récolté, section posée) : un monde vu avant un tel changement ne peut
+    plus revenir, la mémoire des états vus est donc vidée à chaque fois.
+    Elle est de plus limitée, comme les empreintes par tick, aux
+    ZOBRIST_HISTORY derniers ticks.
+    """
+
+    def __init__(self, env, agents):
+        self.env = env
+        self.cols = env.cols
+        self._index = {agent.uid: i for i, agent in enumerate(agents)}
+        self.value = self.compute(env, agents)
+        self.history = Config.ZOBRIST_HISTORY
+        self.checksums = deque(maxlen=self.history)  # Empreinte à la fin des derniers ticks (record)
+        self._first_seen = {}  # empreinte -> premier tick où elle a été vue (depuis le dernier changement de terrain)
+        env.subscribe(EVENT_CELL_CHANGED, self._on_cell_changed)
+        env.subscribe(EVENT_WOOD_DEPOSITED, self._on_wood_deposited)
+        env.subscribe(EVENT_WOOD_WITHDRAWN, self._on_wood_withdrawn)
+        env.subscribe(EVENT_BRIDGE_PROGRESS, self._on_bridge_progress)
+
+    def compute(self, env, agents):
+        """Empreinte complète recalculée (référence de la mise à jour incrémentale)"""
+        value = 0
+        cols = env.cols
+        for y, row in enumerate(env.grid):
+            for x, cell in enumerate(row):
+                value ^= _key(KEY_TERRAIN, y * cols + x, TERRAIN_CODES[cell])
+        for (row, col), progress in env.bridge_progress.items():
+            value ^= _key(KEY_PROGRESS, row * cols + col, progress)
+        value ^= _key(KEY_WOODSTOCK, env.woodstock["wood"])
+        for i, agent in enumerate(agents):
+            value ^= self._agent_key(i, agent.x, agent.y, agent.inventory)
+        return value
+
+    def _agent_key(self, index, x, y, inventory):
+        return _key(KEY_AGENT, index, (y * self.cols + x) * 2 + (inventory is not None))
+
+    def _on_cell_changed(self, data):
+        x, y, old, new = data
+        cell = y * self.cols + x
+        self.value ^= _key(KEY_TERRAIN, cell, TERRAIN_CODES[old]) ^ _key(KEY_TERRAIN, cell, TERRAIN_CODES[new])
+        self._first_seen.clear()
+
+    def _on_wood_deposited(self, data):
+        wood = self.env.woodstock["wood"]
+        self.value ^= _key(KEY_WOODSTOCK, wood - 1) ^ _key(KEY_WOODSTOCK, wood)
+
+    def _on_wood_withdrawn(self, data):
+        wood = self.env.woodstock["wood"]
+        self.value ^= _key(KEY_WOODSTOCK, wood + 1) ^ _key(KEY_WOODSTOCK, wood)
+
+    def _on_bridge_progress(self, data):
+        """Une unité de bois de plus sur une section (aucune clé tant qu'elle est vide)"""
+        x, y, progress = data
+        cell = y * self.cols + x
+        if progress > 1:
+            self.value ^= _key(KEY_PROGRESS, cell, progress - 1)
+        self.value ^= _key(KEY_PROGRESS, cell, progress)
+        self._first_seen.clear()
+
+    def agent_changed(self, agent, old_x, old_y, old_inventory):
+        """Position ou inventaire d'un agent modifié (ancien état en paramètres)"""
+        index = self._index[agent.uid]
+        self.value ^= self._agent_key(index, old_x, old_y, old_inventory) \
+            ^ self._agent_key(index, agent.x, agent.y, agent.inventory)
+
+    def record(self):
+        """
+        Enregistre l'empreinte du tick qui vient de s'écouler ; retourne le
+        premier tick où le même monde a déjà été vu (None sinon)
+        """
+        tick = self.env.tick
+        self.checksums.append(self.value)
+        first = self._first_seen.setdefault(self.value, tick)
+        if self.history is not None and len(self._first_seen) > self.history:
+            # Oublier l'état vu le plus tôt (ordre d'insertion)
+            del self._first_seen[next(iter(self._first_seen))]
+        return first if first != tick else None
+
+
+def trajectory(map_file=None, seed=0, ticks=500, overrides=None):
+    """Empreintes par tick d'une exécution (avec des attributs de Config modifiés)"""
+    from experiments import config_overrides
+    from simulation import Simulation
+
+    values = dict(overrides or {}, ZOBRIST_HASH=True, ZOBRIST_HISTORY=None)
+    with config_overrides(values):
+        random.seed(seed)
+        simulation = Simulation(map_file)
+        while not simulation.stopped and simulation.tick < ticks:
+            simulation.step()
+        return list(simulation.env.zobrist.checksums)
+
+
+def first_divergence(reference, candidate):
+    """Premier tick (à partir de 1) où deux suites d'empreintes diffèrent, None si identiques"""
+    for tick, (a, b) in enumerate(zip(reference, candidate), 1):
+        if a != b:
+            return tick
+    if len(reference) != len(candidate):
+        return min(len(reference), len(candidate)) + 1
+    return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare la trajectoire de modes de Config à celle de référence")
+    parser.add_argument("modes", nargs="+", help="Attributs booléens de Config à activer (un mode chacun)")
+    parser.add_argument("--map", default=None, help="Fichier de carte")
+    parser.add_argument("--seeds", type=int, default=4, help="Nombre de graines (0..N-1)")
+    parser.add_argument("--ticks", type=int, default=1000)
+    args = parser.parse_args()
+
+    for seed in range(args.seeds):
+        reference = trajectory(args.map, seed, args.ticks)
+        for mode in args.modes:
+            tick = first_divergence(reference, trajectory(args.map, seed, args.ticks, {mode: True}))
+            status = "identique" if tick is None else f"diverge au tick {tick}"
+            print(f"graine {seed} {mode}: {status} ({len(reference)} ticks de référence)")
+
+
+if __name__ == "__main__":
+    main()